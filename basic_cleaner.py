@@ -6,6 +6,16 @@ import re
 from typing import Optional
 from config import config
 
+# RE2 (google-re2) runs the HTML tag pattern as a linear-time DFA scan,
+# avoiding backtracking on pathological markup. Falls back to stdlib re.
+try:
+    import re2 as _tag_re_engine
+except ImportError:
+    _tag_re_engine = re
+
+# Compiled once at import time instead of per document
+_HTML_TAG_RE = _tag_re_engine.compile(r"<[^>]+>")
+
 
 def basic_clean(text: str) -> str:
     """
@@ -18,15 +28,12 @@ def basic_clean(text: str) -> str:
         Cleaned text
     """
     # Remove HTML tags
-    text = re.sub(r"<[^>]+>", " ", text)
-    
-    # Remove excessive whitespace
-    text = re.sub(r"\s+", " ", text)
-    
-    # Strip leading/trailing whitespace
-    text = text.strip()
+    text = _HTML_TAG_RE.sub(" ", text)
     
-    return text
+    # Collapse whitespace runs to a single space and strip both ends.
+    # str.split() scans in C with the same Unicode whitespace set as
+    # re's \s, so this matches re.sub(r"\s+", " ", text).strip()
+    return " ".join(text.split())
 
 
 def basic_filter(text: str) -> bool:
@@ -39,19 +46,20 @@ def basic_filter(text: str) -> bool:
     Returns:
         True if text passes filters, False otherwise
     """
-    # Check minimum length
-    if len(text) < config.min_text_length:
-        return False
-    
-    # Check maximum length
-    if len(text) > config.max_text_length:
-        return False
-    
-    # Filter out texts with too many URLs (likely spam)
-    if text.count("http") > config.max_http_count:
+    # Check minimum/maximum length first (O(1)) so rejected texts are never scanned
+    n = len(text)
+    if n < config.min_text_length or n > config.max_text_length:
         return False
     
-    return True
+    # Filter out texts with too many URLs (likely spam).
+    # Stops at the first occurrence over the limit instead of counting
+    # every "http" in URL-heavy documents.
+    pos = -1
+    for _ in range(config.max_http_count + 1):
+        pos = text.find("http", pos + 1)
+        if pos < 0:
+            return True
+    return False
 
 
 def clean_and_filter(text: str) -> Optional[str]:
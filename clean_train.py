@@ -28,9 +28,10 @@ process_jsonl_file(
     output_file="output/train_cleaned.jsonl",
     reset_dedup=True,
     progress_interval=10000,  # Her 10K örnekte progress göster
-    language_filter_enabled=True,
+    language_filter_enabled=True,  # "source" etiketli güvenilir kayıtlar (wiki) fasttext'i atlar
     dedup_enabled=True,
     use_quality_module=True,  # Tüm yeni filtreler aktif
+    num_workers=os.cpu_count() or 1,  # Filtreler tüm çekirdeklerde paralel
 )
 
 print()
@@ -4,9 +4,23 @@ Configuration file for pretrain data processing pipeline
 from dataclasses import dataclass
 from typing import List
 
-@dataclass
+# Default PII patterns (overlapping variants merged so each text needs fewer alternatives)
+DEFAULT_PII_PATTERNS = (
+    r"\b\d{10,11}\b",  # TC Kimlik No (11 digits) / phone number (10 digits, simple)
+    r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z]{2,}",  # Email
+    r"\b\d{4}[-\s]?\d{4}[-\s]?\d{4}[-\s]?\d{4}\b",  # Credit card (dash/space/whitespace separated)
+)
+
+
+@dataclass(slots=True)
 class Config:
-    """Main configuration class"""
+    """
+    Main configuration class
+    
+    Uses __slots__ so the per-document attribute reads on the hot path
+    (e.g. config.min_text_length) are slot fetches instead of __dict__
+    lookups. Still mutable: scripts set fields at runtime.
+    """
     
     # Paths
     output_dir: str = "output"
@@ -18,15 +32,32 @@ class Config:
     max_http_count: int = 3
     
     # Language filter settings
-    lang_model_path: str = "lid.176.bin"  # fasttext language model
+    lang_model_path: str = "lid.176.ftz"  # fasttext language model (quantized, ~1 MB; lid.176.bin also works)
     allowed_languages: List[str] = None
+    lang_model_sha256: str = None  # Expected SHA256 of the model file, checked after download (None = size check only)
     min_lang_confidence: float = 0.7
+    lang_latin_fastpath: bool = False  # Accept >=95% Latin-script texts without fasttext (any Latin language passes)
+    lang_rust_backend: bool = False  # Run language ID on underthesea_core's Rust FastText (if installed) instead of fasttext
+    lang_cache_size: int = 1_000_000  # Cached predictions per process (LRU), keyed by 64-bit sample digest (0 = off)
     
     # Deduplication settings
     exact_dedup_enabled: bool = True
+    exact_dedup_bloom: bool = False  # Bloom filter instead of a hash set: ~40x less RAM, rare false duplicates
+    exact_dedup_bloom_capacity: int = 10_000_000  # Expected number of unique texts (per deduplicator)
+    exact_dedup_bloom_error_rate: float = 1e-6  # False duplicate rate while under capacity
     fuzzy_dedup_enabled: bool = False  # Disabled for speed (~10-50x faster), exact dedup still active
     fuzzy_similarity_threshold: float = 0.9
     minhash_num_perm: int = 128
+    minhash_ngram_size: int = 0  # 0 = word shingles; >0 = character n-gram shingles of this size (e.g. 5)
+    shingle_dedup_enabled: bool = False  # Near-dup check via a Bloom filter over word n-gram shingles (bounded RAM, needs numpy)
+    shingle_dedup_ngram_size: int = 13  # Words per shingle
+    shingle_dedup_threshold: float = 0.8  # Duplicate if at least this fraction of a text's shingles was seen before
+    shingle_dedup_capacity: int = 100_000_000  # Expected number of unique shingles (~420 MB of bits at 1e-7)
+    shingle_dedup_error_rate: float = 1e-7  # Per-shingle false positive rate while under capacity
+    global_dedup_shared_bloom: bool = False  # Parallel mix: exact dedup across sources while cleaning, via a shared-memory Bloom filter (no second pass)
+    global_dedup_bloom_capacity: int = 100_000_000  # Expected number of unique texts across all sources
+    global_dedup_bloom_error_rate: float = 1e-7  # False duplicate rate while under capacity (~420 MB at 100M)
+    dedup_shards: int = 1  # >1: global dedup split into hash-prefix shards deduped in parallel (bounded RAM per shard)
     
     # PII filter patterns
     pii_patterns: List[str] = None
@@ -52,14 +83,7 @@ class Config:
             self.allowed_languages = ["tr", "en"]
         
         if self.pii_patterns is None:
-            # Default PII patterns
-            self.pii_patterns = [
-                r"\b\d{11}\b",  # TC Kimlik No (11 digits)
-                r"\b\d{10}\b",  # Phone number (simple)
-                r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z]{2,}",  # Email
-                r"\b\d{4}[- ]?\d{4}[- ]?\d{4}[- ]?\d{4}\b",  # Credit card
-                r"\b\d{4}[-\s]?\d{4}[-\s]?\d{4}[-\s]?\d{4}\b",  # Credit card alternative
-            ]
+            self.pii_patterns = list(DEFAULT_PII_PATTERNS)
 
 # Global config instance
 config = Config()
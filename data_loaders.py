@@ -2,11 +2,68 @@
 Data loaders for different data sources
 Converts various formats to standardized {"text": "..."} format
 """
+import importlib.util
 import os
-import json
-from typing import Iterator, Dict
+from typing import Iterator, Dict, Iterable, Optional
+
+# hf_transfer (Rust, parallel chunks) speeds up Hub downloads; the flag must be
+# set before huggingface_hub is imported and is only valid when it is installed
+if importlib.util.find_spec("hf_transfer") is not None:
+    os.environ.setdefault("HF_HUB_ENABLE_HF_TRANSFER", "1")
+
+import fsspec
+import orjson
 from datasets import load_dataset
 
+from jsonl_io import iter_jsonl, iter_lines, prefetch, READ_CHUNK_SIZE, WRITE_BUFFER_SIZE
+
+# Records per batch when iterating HuggingFace datasets
+HF_BATCH_SIZE = 10_000
+
+# Read-ahead block size for streamed remote files. fsspec's 5 MiB default makes
+# large compressed shards (e.g. mC4) cross many block boundaries, each a separate
+# range request feeding the decompressor.
+HF_STREAM_BLOCK_SIZE = 64 * 2**20
+fsspec.spec.AbstractBufferedFile.DEFAULT_BLOCK_SIZE = HF_STREAM_BLOCK_SIZE
+
+# Flush accumulated output once it reaches this many bytes
+WRITE_FLUSH_SIZE = 1 << 20
+
+# Items fetched ahead by the background prefetch thread
+HF_PREFETCH_BATCHES = 4
+PREFETCH_RECORDS = 1024
+
+
+def _count_cache_path(file_path: str) -> str:
+    """Sidecar file holding the cached example count of file_path"""
+    return file_path + ".count.json"
+
+
+def _read_cached_count(file_path: str) -> Optional[int]:
+    """
+    Return the example count cached in the sidecar file, if it is still valid
+    (file size and mtime unchanged since it was written), else None
+    """
+    try:
+        st = os.stat(file_path)
+        with open(_count_cache_path(file_path), "rb") as f:
+            cached = orjson.loads(f.read())
+        if cached["mtime_ns"] == st.st_mtime_ns and cached["size"] == st.st_size:
+            return cached["count"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    return None
+
+
+def _write_cached_count(file_path: str, count: int):
+    """Store the exact example count of file_path in its sidecar file"""
+    try:
+        st = os.stat(file_path)
+        with open(_count_cache_path(file_path), "wb") as f:
+            f.write(orjson.dumps({"mtime_ns": st.st_mtime_ns, "size": st.st_size, "count": count}))
+    except OSError:
+        pass  # Cache is optional (e.g. read-only directory)
+
 
 def _check_file_exists(file_path: str, min_examples: int = None) -> tuple[bool, int]:
     """
@@ -19,15 +76,48 @@ def _check_file_exists(file_path: str, min_examples: int = None) -> tuple[bool,
     Returns:
         Tuple of (exists_and_sufficient, count)
         - exists_and_sufficient: True if file exists and has enough examples
-        - count: Number of examples in file (0 if file doesn't exist)
+        - count: Number of examples in file (0 if file doesn't exist); counting
+          stops once min_examples is reached, so it is then a lower bound
     """
     if not os.path.exists(file_path):
         return False, 0
     
-    # Count lines in file
+    # Parquet stores its row count in the footer metadata
+    if file_path.endswith(".parquet"):
+        try:
+            import pyarrow.parquet as pq
+            count = pq.ParquetFile(file_path).metadata.num_rows
+        except Exception:
+            return False, 0
+        if min_examples is None:
+            return True, count
+        return count >= min_examples, count
+    
+    # Reuse the count from the sidecar cache when the file is unchanged
+    cached = _read_cached_count(file_path)
+    if cached is not None:
+        if min_examples is None:
+            return True, cached
+        return cached >= min_examples, cached
+    
+    # Count newlines in binary blocks (C-level bytes.count, no per-line objects).
+    # Our JSONL writers never emit blank lines, so lines == examples.
     try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            count = sum(1 for line in f if line.strip())
+        count = 0
+        last_byte = b"\n"
+        with open(file_path, "rb") as f:
+            while True:
+                block = f.read(READ_CHUNK_SIZE)
+                if not block:
+                    break
+                count += block.count(b"\n")
+                last_byte = block[-1:]
+                if min_examples is not None and count >= min_examples:
+                    return True, count
+        
+        if last_byte != b"\n":
+            count += 1  # Last line without trailing newline
+        _write_cached_count(file_path, count)  # Full count: safe to cache
         
         if min_examples is None:
             return True, count  # File exists, no minimum requirement
@@ -37,14 +127,105 @@ def _check_file_exists(file_path: str, min_examples: int = None) -> tuple[bool,
         return False, 0
 
 
-def load_oscar_tr(output_file: str = "oscar_tr_raw.jsonl", max_examples: int = None) -> str:
+def _write_hf_batches(ds, output_file: str, max_examples: int = None) -> int:
     """
-    Load Turkish text from mC4 dataset (alternative to OSCAR-TR)
-    Uses allenai/c4 with Turkish language subset
+    Write a HuggingFace dataset's "text" column to JSONL in column batches
+    (one Python loop iteration and one file write per batch, not per record).
+    Output paths ending in ".parquet" are written as Parquet instead.
     
     Args:
+        ds: HuggingFace (streaming) dataset with a "text" column
+        output_file: Output JSONL (or .parquet) file path
+        max_examples: Maximum number of examples to write (None = no limit)
+        
+    Returns:
+        Number of examples written
+    """
+    if output_file.endswith(".parquet"):
+        return _write_hf_batches_parquet(ds, output_file, max_examples)
+    
+    count = 0
+    with open(output_file, "wb", buffering=WRITE_BUFFER_SIZE) as f:
+        for batch in prefetch(ds.iter(batch_size=HF_BATCH_SIZE), max_pending=HF_PREFETCH_BATCHES):
+            lines = [
+                orjson.dumps({"text": text}, option=orjson.OPT_APPEND_NEWLINE)
+                for t in batch["text"]
+                if t and (text := t.strip())
+            ]
+            if max_examples:
+                lines = lines[:max_examples - count]
+            
+            f.write(b"".join(lines))
+            previous = count
+            count += len(lines)
+            
+            if count // 10000 > previous // 10000:
+                print(f"  Processed {count:,} examples...")
+            if max_examples and count >= max_examples:
+                break
+    
+    return count
+
+
+def _write_hf_batches_parquet(ds, output_file: str, max_examples: int = None) -> int:
+    """
+    Parquet variant of _write_hf_batches: a single zstd-compressed "text"
+    column written one record batch per HF batch, so readers get contiguous
+    UTF-8 buffers with no per-record JSON parsing
+    
+    Args:
+        ds: HuggingFace (streaming) dataset with a "text" column
+        output_file: Output Parquet file path
+        max_examples: Maximum number of examples to write (None = no limit)
+        
+    Returns:
+        Number of examples written
+    """
+    # pyarrow is installed as a dependency of datasets
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    
+    schema = pa.schema([("text", pa.large_string())])
+    count = 0
+    with pq.ParquetWriter(output_file, schema, compression="zstd") as writer:
+        for batch in prefetch(ds.iter(batch_size=HF_BATCH_SIZE), max_pending=HF_PREFETCH_BATCHES):
+            texts = [text for t in batch["text"] if t and (text := t.strip())]
+            if max_examples:
+                texts = texts[:max_examples - count]
+            
+            if texts:
+                writer.write_batch(pa.record_batch([pa.array(texts, type=pa.large_string())], schema=schema))
+            previous = count
+            count += len(texts)
+            
+            if count // 10000 > previous // 10000:
+                print(f"  Processed {count:,} examples...")
+            if max_examples and count >= max_examples:
+                break
+    
+    return count
+
+
+def _stream_hf_to_jsonl(
+    dataset_name: str,
+    config_name: str,
+    output_file: str,
+    max_examples: int,
+    label: str,
+    description: str,
+) -> str:
+    """
+    Stream a HuggingFace dataset's "text" column to a normalized JSONL file
+    (Parquet if output_file ends with ".parquet"), reusing an existing output
+    file when present (shared by the HF loaders)
+    
+    Args:
+        dataset_name: HuggingFace dataset name (e.g. "wikimedia/wikipedia")
+        config_name: Dataset config/subset name (e.g. "20231101.tr")
         output_file: Output file path for normalized data
         max_examples: Maximum number of examples to load (None = no limit)
+        label: Short source label for log messages (e.g. "Wiki-TR")
+        description: Dataset description for the loading banner
         
     Returns:
         Path to the normalized file
@@ -52,37 +233,46 @@ def load_oscar_tr(output_file: str = "oscar_tr_raw.jsonl", max_examples: int = N
     # Check if file already exists and has enough examples
     exists, count = _check_file_exists(output_file, max_examples)
     if exists:
-        print(f"mC4-TR: File already exists with sufficient examples: {output_file}")
-        print(f"  Existing examples: {count:,}")
+        print(f"{label}: File already exists with sufficient examples: {output_file}")
+        # With a minimum, counting may stop once it is reached (a lower bound)
+        print(f"  Existing examples: {'≥ ' if max_examples is not None else ''}{count:,}")
         return output_file
     
     # If file exists but insufficient, warn user and use existing
     if os.path.exists(output_file):
-        print(f"mC4-TR: File exists with {count:,} examples but {max_examples:,} needed.")
+        print(f"{label}: File exists with {count:,} examples but {max_examples:,} needed.")
         print(f"  Using existing file. Consider deleting {output_file} to re-download.")
         return output_file
     
     limit_str = f" (max: {max_examples:,} examples)" if max_examples else ""
-    print(f"Loading Turkish mC4 dataset (allenai/c4){limit_str}...")
-    ds = load_dataset("allenai/c4", "tr", split="train", streaming=True)
+    print(f"Loading {description} ({dataset_name}){limit_str}...")
+    ds = load_dataset(dataset_name, config_name, split="train", streaming=True)
     
-    count = 0
-    with open(output_file, "w", encoding="utf-8") as f:
-        for x in ds:
-            text = x.get("text", "").strip()
-            if len(text) > 0:
-                json_line = json.dumps({"text": text}, ensure_ascii=False)
-                f.write(json_line + "\n")
-                count += 1
-                if count % 10000 == 0:
-                    print(f"  Processed {count:,} examples...")
-                if max_examples and count >= max_examples:
-                    break
+    count = _write_hf_batches(ds, output_file, max_examples)
+    _write_cached_count(output_file, count)
     
-    print(f"mC4-TR: Saved {count:,} examples to {output_file}")
+    print(f"{label}: Saved {count:,} examples to {output_file}")
     return output_file
 
 
+def load_oscar_tr(output_file: str = "oscar_tr_raw.jsonl", max_examples: int = None) -> str:
+    """
+    Load Turkish text from mC4 dataset (alternative to OSCAR-TR)
+    Uses allenai/c4 with Turkish language subset
+    
+    Args:
+        output_file: Output file path for normalized data
+        max_examples: Maximum number of examples to load (None = no limit)
+        
+    Returns:
+        Path to the normalized file
+    """
+    return _stream_hf_to_jsonl(
+        "allenai/c4", "tr", output_file, max_examples,
+        label="mC4-TR", description="Turkish mC4 dataset",
+    )
+
+
 def load_wikipedia_tr(output_file: str = "wiki_tr_raw.jsonl", max_examples: int = None) -> str:
     """
     Load Turkish Wikipedia dataset and convert to standardized format
@@ -94,39 +284,11 @@ def load_wikipedia_tr(output_file: str = "wiki_tr_raw.jsonl", max_examples: int
     Returns:
         Path to the normalized file
     """
-    # Check if file already exists and has enough examples
-    exists, count = _check_file_exists(output_file, max_examples)
-    if exists:
-        print(f"Wiki-TR: File already exists with sufficient examples: {output_file}")
-        print(f"  Existing examples: {count:,}")
-        return output_file
-    
-    # If file exists but insufficient, warn user and use existing
-    if os.path.exists(output_file):
-        print(f"Wiki-TR: File exists with {count:,} examples but {max_examples:,} needed.")
-        print(f"  Using existing file. Consider deleting {output_file} to re-download.")
-        return output_file
-    
-    limit_str = f" (max: {max_examples:,} examples)" if max_examples else ""
-    print(f"Loading Turkish Wikipedia dataset (wikimedia/wikipedia){limit_str}...")
     # Use new wikimedia/wikipedia dataset (20231101 is the latest supported version)
-    ds = load_dataset("wikimedia/wikipedia", "20231101.tr", split="train", streaming=True)
-    
-    count = 0
-    with open(output_file, "w", encoding="utf-8") as f:
-        for x in ds:
-            text = x.get("text", "").strip()
-            if len(text) > 0:
-                json_line = json.dumps({"text": text}, ensure_ascii=False)
-                f.write(json_line + "\n")
-                count += 1
-                if count % 10000 == 0:
-                    print(f"  Processed {count:,} examples...")
-                if max_examples and count >= max_examples:
-                    break
-    
-    print(f"Wiki-TR: Saved {count:,} examples to {output_file}")
-    return output_file
+    return _stream_hf_to_jsonl(
+        "wikimedia/wikipedia", "20231101.tr", output_file, max_examples,
+        label="Wiki-TR", description="Turkish Wikipedia dataset",
+    )
 
 
 def load_wikipedia_en(output_file: str = "wiki_en_raw.jsonl", max_examples: int = None) -> str:
@@ -140,39 +302,49 @@ def load_wikipedia_en(output_file: str = "wiki_en_raw.jsonl", max_examples: int
     Returns:
         Path to the normalized file
     """
-    # Check if file already exists and has enough examples
-    exists, count = _check_file_exists(output_file, max_examples)
-    if exists:
-        print(f"Wiki-EN: File already exists with sufficient examples: {output_file}")
-        print(f"  Existing examples: {count:,}")
-        return output_file
-    
-    # If file exists but insufficient, warn user and use existing
-    if os.path.exists(output_file):
-        print(f"Wiki-EN: File exists with {count:,} examples but {max_examples:,} needed.")
-        print(f"  Using existing file. Consider deleting {output_file} to re-download.")
-        return output_file
-    
-    limit_str = f" (max: {max_examples:,} examples)" if max_examples else ""
-    print(f"Loading English Wikipedia dataset (wikimedia/wikipedia){limit_str}...")
     # Use new wikimedia/wikipedia dataset (20231101 is the latest supported version)
-    ds = load_dataset("wikimedia/wikipedia", "20231101.en", split="train", streaming=True)
+    return _stream_hf_to_jsonl(
+        "wikimedia/wikipedia", "20231101.en", output_file, max_examples,
+        label="Wiki-EN", description="English Wikipedia dataset",
+    )
+
+
+def _write_records(records: Iterable, output_file: str, max_examples: int) -> int:
+    """
+    Write arbitrary records (dicts with "text", or anything str() can render)
+    to JSONL, accumulating output in a reused bytearray flushed every WRITE_FLUSH_SIZE bytes
     
+    Args:
+        records: Iterable of records
+        output_file: Output JSONL file path
+        max_examples: Maximum number of examples to write
+        
+    Returns:
+        Number of examples written
+    """
     count = 0
-    with open(output_file, "w", encoding="utf-8") as f:
-        for x in ds:
-            text = x.get("text", "").strip()
-            if len(text) > 0:
-                json_line = json.dumps({"text": text}, ensure_ascii=False)
-                f.write(json_line + "\n")
+    buf = bytearray()
+    with open(output_file, "wb", buffering=0) as f:
+        write = f.write
+        for x in prefetch(records, max_pending=PREFETCH_RECORDS):
+            if isinstance(x, dict):
+                text = x.get("text", "").strip()
+            else:
+                text = str(x).strip()
+            
+            if text:
+                buf += orjson.dumps({"text": text}, option=orjson.OPT_APPEND_NEWLINE)
+                if len(buf) >= WRITE_FLUSH_SIZE:
+                    write(buf)
+                    buf.clear()  # Reuses the allocation
                 count += 1
                 if count % 10000 == 0:
                     print(f"  Processed {count:,} examples...")
-                if max_examples and count >= max_examples:
+                if count >= max_examples:
                     break
+        write(buf)
     
-    print(f"Wiki-EN: Saved {count:,} examples to {output_file}")
-    return output_file
+    return count
 
 
 def load_common_crawl(output_file: str = "cc_raw.jsonl", language: str = "en", max_examples: int = None) -> str:
@@ -195,7 +367,8 @@ def load_common_crawl(output_file: str = "cc_raw.jsonl", language: str = "en", m
     exists, count = _check_file_exists(output_file, max_examples)
     if exists:
         print(f"Common Crawl ({language}): File already exists with sufficient examples: {output_file}")
-        print(f"  Existing examples: {count:,}")
+        # Counting stops once max_examples is reached (a lower bound)
+        print(f"  Existing examples: ≥ {count:,}")
         return output_file
     
     # If file exists but insufficient, warn user and use existing
@@ -215,22 +388,14 @@ def load_common_crawl(output_file: str = "cc_raw.jsonl", language: str = "en", m
             # Adjust for Turkish Common Crawl if available
             ds = load_dataset(f"oscar-corpus/OSCAR-2301", language, split="train")
         
-        count = 0
-        with open(output_file, "w", encoding="utf-8") as f:
-            for x in ds:
-                if isinstance(x, dict):
-                    text = x.get("text", "").strip()
-                else:
-                    text = str(x).strip()
-                
-                if len(text) > 0:
-                    json_line = json.dumps({"text": text}, ensure_ascii=False)
-                    f.write(json_line + "\n")
-                    count += 1
-                    if count % 10000 == 0:
-                        print(f"  Processed {count:,} examples...")
-                    if count >= max_examples:
-                        break
+        if hasattr(ds, "iter"):
+            # HF datasets always yield dict records: take the "text" column in
+            # batches instead of type-checking and .get()-ing every record
+            count = _write_hf_batches(ds, output_file, max_examples)
+        else:
+            count = _write_records(ds, output_file, max_examples)
+        
+        _write_cached_count(output_file, count)
         
         print(f"Common Crawl: Saved {count:,} examples to {output_file}")
         return output_file
@@ -249,14 +414,24 @@ def load_jsonl_file(file_path: str) -> Iterator[Dict]:
     Yields:
         Dictionary with "text" key
     """
-    with open(file_path, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if line:
-                try:
-                    yield json.loads(line)
-                except json.JSONDecodeError:
-                    continue
+    yield from iter_jsonl(file_path)
+
+
+def load_parquet_file(file_path: str) -> Iterator[Dict]:
+    """
+    Load a Parquet file written by the loaders and yield each row as a dictionary
+    
+    Args:
+        file_path: Path to Parquet file with a "text" column
+        
+    Yields:
+        Dictionary with "text" key
+    """
+    import pyarrow.parquet as pq
+    
+    for batch in pq.ParquetFile(file_path).iter_batches(batch_size=HF_BATCH_SIZE, columns=["text"]):
+        for text in batch.column(0).to_pylist():
+            yield {"text": text}
 
 
 def load_text_file(file_path: str) -> Iterator[Dict]:
@@ -269,9 +444,8 @@ def load_text_file(file_path: str) -> Iterator[Dict]:
     Yields:
         Dictionary with "text" key for each paragraph/line
     """
-    with open(file_path, "r", encoding="utf-8") as f:
-        for line in f:
-            text = line.strip()
-            if text:
-                yield {"text": text}
+    for line in iter_lines(file_path):
+        text = line.decode("utf-8").strip()
+        if text:
+            yield {"text": text}
 
@@ -3,42 +3,312 @@ Deduplication module
 Exact deduplication using hashing and fuzzy deduplication using MinHash
 """
 import hashlib
-from typing import Set, Optional
+import math
+from typing import List, Set, Optional
 from config import config
 
+# xxhash's XXH3 (SIMD) computes the 16-byte exact-dedup digest several times
+# faster than MD5. Falls back to MD5 when xxhash is not installed.
+try:
+    from xxhash import xxh3_128_digest as _digest
+except ImportError:
+    def _digest(data: bytes) -> bytes:
+        return hashlib.md5(data, usedforsecurity=False).digest()
+
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def _lsh_num_bands(threshold: float, num_perm: int) -> int:
+    """
+    Pick the LSH band count (a divisor of num_perm) whose similarity
+    threshold (1/b)^(1/r) is closest to the requested threshold
+    """
+    candidates = [b for b in range(1, num_perm + 1) if num_perm % b == 0]
+    return min(candidates, key=lambda b: abs((1 / b) ** (b / num_perm) - threshold))
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over 16-byte digests, used as a bounded-memory
+    alternative to the exact_seen set (~3.6 bytes per entry at 1e-6)
+    
+    Never misses a real duplicate; a new text is wrongly reported as seen with
+    probability ~error_rate while fewer than `capacity` entries are stored.
+    """
+    
+    def __init__(self, capacity: int, error_rate: float, buffer=None):
+        self.num_bits = max(8, math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        # buffer: optional zeroed writable buffer of num_bytes() bytes
+        # (e.g. shared memory) to keep the bits in
+        self.bits = bytearray((self.num_bits + 7) // 8) if buffer is None else buffer
+    
+    @staticmethod
+    def num_bytes(capacity: int, error_rate: float) -> int:
+        """Size in bytes of the bit array for the given capacity and error rate"""
+        num_bits = max(8, math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        return (num_bits + 7) // 8
+    
+    def check_and_add(self, digest: bytes) -> bool:
+        """
+        Add a digest to the filter
+        
+        Args:
+            digest: 16-byte digest (its two halves drive double hashing)
+            
+        Returns:
+            True if the digest was (probably) already present
+        """
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:16], "little") | 1
+        bits = self.bits
+        num_bits = self.num_bits
+        present = True
+        for i in range(self.num_hashes):
+            pos = (h1 + i * h2) % num_bits
+            mask = 1 << (pos & 7)
+            if not bits[pos >> 3] & mask:
+                bits[pos >> 3] |= mask
+                present = False
+        return present
+
+
+def _mix64(x):
+    """splitmix64 finalizer over a uint64 array (wrapping arithmetic)"""
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def shingle_hashes(text: str, ngram_size: int):
+    """
+    64-bit hashes of the word n-gram shingles of a text
+    
+    Each word is hashed once (stable digest, same in every process); the
+    hashes of all n-word windows are then combined in one vectorized NumPy
+    pass instead of joining and hashing every shingle string.
+    
+    Args:
+        text: Input text
+        ngram_size: Words per shingle (texts with fewer words form one shingle)
+        
+    Returns:
+        uint64 array with one hash per shingle
+    """
+    words = text.split()
+    if not words:
+        return np.zeros(0, dtype=np.uint64)
+    word_hashes = np.frombuffer(
+        b"".join([_digest(word.encode("utf-8"))[:8] for word in words]), dtype=np.uint64
+    )
+    n = min(ngram_size, len(words))
+    windows = np.lib.stride_tricks.sliding_window_view(word_hashes, n)
+    # Position-dependent mix, so word order matters within a shingle
+    weights = _mix64(np.arange(1, n + 1, dtype=np.uint64))
+    with np.errstate(over="ignore"):
+        return _mix64((windows * weights).sum(axis=1, dtype=np.uint64))
+
+
+class ShingleBloomFilter:
+    """
+    NumPy Bloom filter over 64-bit shingle hashes: all bit positions of all
+    shingles of a text are computed, tested and set as whole-array operations
+    """
+    
+    def __init__(self, capacity: int, error_rate: float):
+        self.num_bits = max(8, math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = np.zeros((self.num_bits + 7) // 8, dtype=np.uint8)
+        self._probe = np.arange(self.num_hashes, dtype=np.uint64)
+    
+    def _positions(self, hashes):
+        """Bit positions, shape (len(hashes), num_hashes), by double hashing"""
+        h2 = _mix64(hashes) | np.uint64(1)
+        with np.errstate(over="ignore"):
+            return (hashes[:, None] + self._probe[None, :] * h2[:, None]) % np.uint64(self.num_bits)
+    
+    def contains_fraction(self, hashes) -> float:
+        """
+        Fraction of the hashes that are (probably) already in the filter
+        
+        Args:
+            hashes: uint64 array of shingle hashes
+        """
+        if hashes.size == 0:
+            return 0.0
+        pos = self._positions(hashes)
+        bit_set = (self.bits[pos >> np.uint64(3)] >> (pos & np.uint64(7)).astype(np.uint8)) & 1
+        return float(bit_set.all(axis=1).mean())
+    
+    def add(self, hashes):
+        """
+        Add shingle hashes to the filter
+        
+        Args:
+            hashes: uint64 array of shingle hashes
+        """
+        pos = np.sort(self._positions(hashes).ravel())
+        byte_idx = pos >> np.uint64(3)
+        masks = np.left_shift(np.uint8(1), (pos & np.uint64(7)).astype(np.uint8))
+        # OR together the masks hitting the same byte, then set each byte once
+        # (much faster than the unbuffered np.bitwise_or.at)
+        starts = np.flatnonzero(np.r_[True, byte_idx[1:] != byte_idx[:-1]])
+        self.bits[byte_idx[starts]] |= np.bitwise_or.reduceat(masks, starts)
+
+
+# Exact-dedup Bloom filter shared by all processes (see attach_shared_exact_bloom)
+_shared_exact_bloom: Optional[BloomFilter] = None
+_shared_exact_bloom_shm = None  # Keeps the shared memory mapped in this process
+
+
+def create_shared_exact_bloom(capacity: int, error_rate: float):
+    """
+    Allocate a zeroed exact-dedup Bloom filter bit array in shared memory
+    
+    The caller owns the block: close() and unlink() it when all processes
+    are done with it.
+    
+    Args:
+        capacity: Expected number of unique texts across all processes
+        error_rate: False duplicate rate while under capacity
+        
+    Returns:
+        multiprocessing.shared_memory.SharedMemory block
+    """
+    from multiprocessing import shared_memory
+    return shared_memory.SharedMemory(create=True, size=BloomFilter.num_bytes(capacity, error_rate))
+
+
+def attach_shared_exact_bloom(name: str, capacity: int, error_rate: float):
+    """
+    Use the shared-memory Bloom filter `name` for exact dedup in this process:
+    deduplicators created afterwards check and add every text there, so a text
+    already kept by any process counts as a duplicate.
+    
+    Bits are set without locking; two processes racing on the same text (or
+    the same byte) can both keep a copy, never drop a unique text.
+    
+    Args:
+        name: Name of the block from create_shared_exact_bloom
+        capacity: Capacity it was created with
+        error_rate: Error rate it was created with
+    """
+    global _shared_exact_bloom, _shared_exact_bloom_shm
+    from multiprocessing import shared_memory
+    shm = shared_memory.SharedMemory(name=name)
+    _shared_exact_bloom = BloomFilter(capacity, error_rate, buffer=shm.buf)
+    _shared_exact_bloom_shm = shm
+
 
 class Deduplicator:
-    """Deduplication handler with exact and fuzzy dedup"""
+    """
+    Deduplication handler with exact and fuzzy dedup
+    
+    Dedup settings are read from config once, when the instance is created
+    (call reset_deduplicator() after changing them).
+    """
     
     def __init__(self):
-        self.exact_seen: Set[str] = set()
+        # Config flags bound once: saves a global + attribute lookup per call
+        self._exact_enabled = config.exact_dedup_enabled
+        self._num_perm = config.minhash_num_perm
+        self._ngram_size = config.minhash_ngram_size
+        
+        # Keys are the digest's first 64 bits as an int (smaller than 16-byte
+        # bytes objects; collision odds ~n^2/2^65, negligible at corpus scale)
+        self.exact_seen: Set[int] = set()
+        self._seen_add = self.exact_seen.add
+        self.exact_bloom: Optional[BloomFilter] = _shared_exact_bloom
+        if self.exact_bloom is None and config.exact_dedup_bloom:
+            self.exact_bloom = BloomFilter(
+                config.exact_dedup_bloom_capacity,
+                config.exact_dedup_bloom_error_rate,
+            )
         self.lsh = None
+        self.minhash_backend: Optional[str] = None  # "rensa" or "datasketch"
+        self._lsh_next_key = 0
+        self._rminhash_cls = None  # rensa.RMinHash, bound once in _init_lsh
+        self._minhash = None  # Reused datasketch MinHash buffer
         
         if config.fuzzy_dedup_enabled:
-            try:
-                from datasketch import MinHashLSH
-                self.lsh = MinHashLSH(
-                    threshold=config.fuzzy_similarity_threshold,
-                    num_perm=config.minhash_num_perm
+            self._init_lsh()
+        self._fuzzy_enabled = config.fuzzy_dedup_enabled and self.lsh is not None
+        
+        self.shingle_bloom: Optional[ShingleBloomFilter] = None
+        self._shingle_ngram_size = config.shingle_dedup_ngram_size
+        self._shingle_threshold = config.shingle_dedup_threshold
+        if config.shingle_dedup_enabled:
+            if np is None:
+                print("Warning: numpy not installed. Shingle Bloom dedup disabled.")
+            else:
+                self.shingle_bloom = ShingleBloomFilter(
+                    config.shingle_dedup_capacity,
+                    config.shingle_dedup_error_rate,
                 )
-            except ImportError:
-                print("Warning: datasketch not installed. Fuzzy dedup disabled.")
-                print("Install with: pip install datasketch")
-                config.fuzzy_dedup_enabled = False
     
-    def _get_hash(self, text: str) -> str:
-        """Get MD5 hash of text for exact dedup"""
-        return hashlib.md5(text.encode("utf-8")).hexdigest()
+    def _init_lsh(self):
+        """Create the LSH index, preferring Rust-backed rensa over datasketch"""
+        try:
+            from rensa import RMinHash, RMinHashLSH
+            self._rminhash_cls = RMinHash
+            self.lsh = RMinHashLSH(
+                threshold=config.fuzzy_similarity_threshold,
+                num_perm=config.minhash_num_perm,
+                num_bands=_lsh_num_bands(config.fuzzy_similarity_threshold, config.minhash_num_perm),
+            )
+            self.minhash_backend = "rensa"
+            return
+        except ImportError:
+            pass
+        
+        try:
+            from datasketch import MinHash, MinHashLSH
+            self.lsh = MinHashLSH(
+                threshold=config.fuzzy_similarity_threshold,
+                num_perm=config.minhash_num_perm
+            )
+            # Building a MinHash regenerates its num_perm permutations (~100x the
+            # cost of clear()), so one instance is created here and reused per text
+            self._minhash = MinHash(num_perm=config.minhash_num_perm)
+            self.minhash_backend = "datasketch"
+        except ImportError:
+            print("Warning: neither rensa nor datasketch installed. Fuzzy dedup disabled.")
+            print("Install with: pip install rensa  (or: pip install datasketch)")
+            config.fuzzy_dedup_enabled = False
+    
+    def _get_hash(self, text: str) -> bytes:
+        """
+        Get 128-bit digest of text for exact dedup (XXH3 or MD5)
+        
+        Returns the raw 16-byte digest (not the 32-char hex string); exact_seen
+        keeps a 64-bit prefix of it, the Bloom filter uses both halves.
+        """
+        return _digest(text.encode("utf-8"))
     
     def _get_minhash(self, text: str):
         """Get MinHash of text for fuzzy dedup"""
-        from datasketch import MinHash
+        n = self._ngram_size
+        if n > 0:
+            # Character n-gram shingles (finer-grained near-duplicate detection)
+            words = {text[i:i + n] for i in range(max(1, len(text) - n + 1))}
+        else:
+            # Use word-based hashing (split by whitespace)
+            words = set(text.split())
+        
+        if self.minhash_backend == "rensa":
+            m = self._rminhash_cls(num_perm=self._num_perm, seed=42)
+            m.update(list(words))
+            return m
         
-        m = MinHash(num_perm=config.minhash_num_perm)
-        # Use word-based hashing (split by whitespace)
-        words = set(text.split())
-        for word in words:
-            m.update(word.encode("utf-8"))
+        # Safe to reuse: LSH query/insert read the hash values immediately
+        m = self._minhash
+        m.clear()
+        # One vectorized permutation + min pass over all words instead of one per word
+        m.update_batch([word.encode("utf-8") for word in words])
         return m
     
     def exact_dedup(self, text: str) -> bool:
@@ -51,14 +321,18 @@ class Deduplicator:
         Returns:
             True if text is NOT a duplicate, False if duplicate found
         """
-        if not config.exact_dedup_enabled:
+        if not self._exact_enabled:
             return True
         
         h = self._get_hash(text)
-        if h in self.exact_seen:
+        if self.exact_bloom is not None:
+            return not self.exact_bloom.check_and_add(h)
+        
+        key = int.from_bytes(h[:8], "little")
+        if key in self.exact_seen:
             return False
         
-        self.exact_seen.add(h)
+        self._seen_add(key)
         return True
     
     def fuzzy_dedup(self, text: str) -> bool:
@@ -71,7 +345,7 @@ class Deduplicator:
         Returns:
             True if text is NOT a duplicate, False if duplicate found
         """
-        if not config.fuzzy_dedup_enabled or self.lsh is None:
+        if not self._fuzzy_enabled:
             return True
         
         try:
@@ -82,15 +356,39 @@ class Deduplicator:
             if len(results) > 0:
                 return False  # Similar text found
             
-            # Add this text's hash to LSH
-            text_hash = self._get_hash(text)
-            self.lsh.insert(text_hash, m)
+            # Add this text to LSH (rensa keys are ints, datasketch keys are the text hash)
+            if self.minhash_backend == "rensa":
+                self.lsh.insert(self._lsh_next_key, m)
+                self._lsh_next_key += 1
+            else:
+                self.lsh.insert(self._get_hash(text), m)
             
             return True
         except Exception as e:
             print(f"Fuzzy dedup error: {e}")
             return True  # On error, allow the text
     
+    def shingle_dedup(self, text: str) -> bool:
+        """
+        Check if a near duplicate exists using the shingle Bloom filter
+        (most of the text's word n-grams were already seen)
+        
+        Args:
+            text: Input text
+            
+        Returns:
+            True if text is NOT a duplicate, False if duplicate found
+        """
+        if self.shingle_bloom is None:
+            return True
+        
+        hashes = shingle_hashes(text, self._shingle_ngram_size)
+        if hashes.size and self.shingle_bloom.contains_fraction(hashes) >= self._shingle_threshold:
+            return False
+        
+        self.shingle_bloom.add(hashes)
+        return True
+    
     def is_duplicate(self, text: str) -> bool:
         """
         Check both exact and fuzzy duplicates
@@ -105,11 +403,61 @@ class Deduplicator:
         if not self.exact_dedup(text):
             return True  # Is duplicate
         
+        # Then check shingle near-duplicates
+        if not self.shingle_dedup(text):
+            return True  # Is duplicate
+        
         # Then check fuzzy duplicates
         if not self.fuzzy_dedup(text):
             return True  # Is duplicate
         
         return False  # Not a duplicate
+    
+    def is_duplicate_batch(self, texts: List[str]) -> List[bool]:
+        """
+        is_duplicate for many texts, in order (a text can be a duplicate of an
+        earlier one in the same batch). Exact dedup runs over the whole batch
+        in one loop with its state bound to locals; shingle and fuzzy dedup
+        then only see the survivors of the previous steps, exactly as
+        is_duplicate does.
+        
+        Args:
+            texts: Input texts
+            
+        Returns:
+            List of booleans aligned with texts (True = duplicate)
+        """
+        results = [False] * len(texts)
+        
+        if self._exact_enabled:
+            if self.exact_bloom is not None:
+                check_and_add = self.exact_bloom.check_and_add
+                for i, text in enumerate(texts):
+                    results[i] = check_and_add(_digest(text.encode("utf-8")))
+            else:
+                seen = self.exact_seen
+                seen_add = self._seen_add
+                from_bytes = int.from_bytes
+                for i, text in enumerate(texts):
+                    key = from_bytes(_digest(text.encode("utf-8"))[:8], "little")
+                    if key in seen:
+                        results[i] = True
+                    else:
+                        seen_add(key)
+        
+        if self.shingle_bloom is not None:
+            shingle_dedup = self.shingle_dedup
+            for i, text in enumerate(texts):
+                if not results[i]:
+                    results[i] = not shingle_dedup(text)
+        
+        if self._fuzzy_enabled:
+            fuzzy_dedup = self.fuzzy_dedup
+            for i, text in enumerate(texts):
+                if not results[i]:
+                    results[i] = not fuzzy_dedup(text)
+        
+        return results
 
 
 # Global deduplicator instance
@@ -129,3 +477,20 @@ def reset_deduplicator():
     global _deduplicator
     _deduplicator = None
 
+
+def get_shard_id(text: str, num_shards: int) -> int:
+    """
+    Map text to a dedup shard by the prefix of its exact-dedup digest
+    
+    Identical texts always land in the same shard, so exact dedup run
+    independently per shard gives the same result as one global pass.
+    
+    Args:
+        text: Input text
+        num_shards: Total number of shards
+        
+    Returns:
+        Shard index in [0, num_shards)
+    """
+    digest = _digest(text.encode("utf-8"))
+    return int.from_bytes(digest[:8], "little") % num_shards
@@ -2,11 +2,19 @@
 Format normalization module
 Converts various input formats to standardized {"text": "..."} format
 """
-import json
+import os
+import multiprocessing as mp
 from typing import Dict, Iterator, Any
 
+import orjson
 
-def normalize_to_jsonl(input_data: Any) -> str:
+from jsonl_io import iter_lines, iter_line_ranges, read_line_range, imap_bounded, WRITE_BUFFER_SIZE
+
+# Bytes of input per task when normalizing JSONL with worker processes
+NORMALIZE_RANGE_SIZE = 8 * 1024 * 1024
+
+
+def normalize_to_jsonl(input_data: Any) -> bytes:
     """
     Normalize input data to JSONL format with {"text": "..."} structure
     
@@ -14,15 +22,20 @@ def normalize_to_jsonl(input_data: Any) -> str:
         input_data: Can be string, dict, or list
         
     Returns:
-        JSONL string line
+        JSONL line as UTF-8 bytes (including the trailing newline)
     """
     if isinstance(input_data, dict):
         # If already has "text" key, use it
         if "text" in input_data:
             text = input_data["text"]
+        # Try to extract text from common keys (str(dict) only as a last resort,
+        # not evaluated eagerly as a .get() default)
+        elif "content" in input_data:
+            text = input_data["content"]
+        elif "body" in input_data:
+            text = input_data["body"]
         else:
-            # Try to extract text from common keys
-            text = input_data.get("content", input_data.get("body", str(input_data)))
+            text = str(input_data)
     elif isinstance(input_data, str):
         text = input_data
     else:
@@ -33,51 +46,70 @@ def normalize_to_jsonl(input_data: Any) -> str:
     
     # Create standardized format
     normalized = {"text": text}
-    return json.dumps(normalized, ensure_ascii=False)
+    return orjson.dumps(normalized, option=orjson.OPT_APPEND_NEWLINE)
+
 
+def _normalize_lines(lines) -> bytes:
+    """Normalize raw JSONL lines, skipping malformed ones; returns the joined output"""
+    out = []
+    for line in lines:
+        try:
+            out.append(normalize_to_jsonl(orjson.loads(line)))
+        except orjson.JSONDecodeError:
+            continue
+    return b"".join(out)
 
-def normalize_dataset(input_file: str, output_file: str):
+
+def _normalize_range(args) -> bytes:
+    """
+    Worker for parallel normalization: reads and normalizes one byte range
+    Args tuple: (input_file, start, end)
+    """
+    input_file, start, end = args
+    return _normalize_lines(read_line_range(input_file, start, end))
+
+
+def normalize_dataset(input_file: str, output_file: str, num_workers: int = 1):
     """
     Normalize an entire dataset file to standard format
     
     Args:
         input_file: Input file path (JSONL, JSON, or text)
         output_file: Output JSONL file path
+        num_workers: Worker processes for JSONL input (1 = run in this process).
+                     Output order is the same for any value.
     """
-    import os
-    
     file_ext = os.path.splitext(input_file)[1].lower()
     
-    with open(output_file, "w", encoding="utf-8") as out_f:
-        if file_ext == ".jsonl":
+    with open(output_file, "wb", buffering=WRITE_BUFFER_SIZE) as out_f:
+        if file_ext == ".jsonl" and num_workers > 1:
+            # Workers parse + encode their own line ranges; only writing is serial
+            ranges = ((input_file, start, end) for start, end in iter_line_ranges(input_file, NORMALIZE_RANGE_SIZE))
+            with mp.Pool(processes=num_workers) as pool:
+                for blob in imap_bounded(pool, _normalize_range, ranges, max_pending=num_workers * 2):
+                    out_f.write(blob)
+        elif file_ext == ".jsonl":
             # Already JSONL format, just normalize structure
-            with open(input_file, "r", encoding="utf-8") as in_f:
-                for line in in_f:
-                    line = line.strip()
-                    if line:
-                        try:
-                            data = json.loads(line)
-                            normalized = normalize_to_jsonl(data)
-                            out_f.write(normalized + "\n")
-                        except json.JSONDecodeError:
-                            continue
+            for line in iter_lines(input_file):
+                try:
+                    data = orjson.loads(line)
+                    out_f.write(normalize_to_jsonl(data))
+                except orjson.JSONDecodeError:
+                    continue
         elif file_ext == ".json":
             # JSON array or object
-            with open(input_file, "r", encoding="utf-8") as in_f:
-                data = json.load(in_f)
+            with open(input_file, "rb") as in_f:
+                data = orjson.loads(in_f.read())
                 if isinstance(data, list):
                     for item in data:
-                        normalized = normalize_to_jsonl(item)
-                        out_f.write(normalized + "\n")
+                        out_f.write(normalize_to_jsonl(item))
                 elif isinstance(data, dict):
-                    normalized = normalize_to_jsonl(data)
-                    out_f.write(normalized + "\n")
+                    out_f.write(normalize_to_jsonl(data))
         else:
             # Plain text file
             with open(input_file, "r", encoding="utf-8") as in_f:
                 for line in in_f:
                     text = line.strip()
                     if text:
-                        normalized = normalize_to_jsonl(text)
-                        out_f.write(normalized + "\n")
+                        out_f.write(normalize_to_jsonl(text))
 
@@ -0,0 +1,316 @@
+"""
+JSONL I/O helpers
+Fast byte-level reading and writing of {"text": "..."} JSONL files using orjson
+"""
+import mmap
+import os
+import queue
+import re
+import shutil
+import threading
+from collections import deque
+from itertools import islice
+from typing import Iterator, Iterable, Dict, List, Optional, Tuple
+
+import orjson
+
+
+# Size of each binary read (bytes)
+READ_CHUNK_SIZE = 4 * 1024 * 1024
+
+# Buffer size for binary output files, so small record writes coalesce
+# into a few large write syscalls
+WRITE_BUFFER_SIZE = 4 * 1024 * 1024
+
+# Lines joined into one write call by write_lines
+WRITE_BATCH_LINES = 8192
+
+# A newline right after another one ends a blank line (lookahead, so runs of
+# blank lines are all counted)
+_BLANK_LINE_RE = re.compile(rb"\n(?=\n)")
+
+
+def iter_lines(file_path: str, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+    """
+    Yield raw lines from a memory-mapped file, finding each newline with
+    mmap.find (no per-line text decoding, readline or block re-joining;
+    MADV_SEQUENTIAL lets the kernel read ahead and drop consumed pages)
+    
+    Args:
+        file_path: Path to input file
+        start: Offset to start reading at (beginning of a line)
+        end: Offset to stop reading at (after a newline, e.g. from
+             iter_line_ranges; None = EOF)
+    
+    Yields:
+        Non-empty lines as bytes, without the trailing newline
+    """
+    with open(file_path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if end is None or end > size:
+            end = size
+        if start >= end:
+            return  # Nothing to read (mmap cannot map an empty file)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if hasattr(mm, "madvise"):
+                mm.madvise(mmap.MADV_SEQUENTIAL)
+            find = mm.find
+            pos = start
+            while pos < end:
+                newline = find(b"\n", pos, end)
+                if newline == -1:
+                    newline = end  # Last line without a trailing newline
+                if newline > pos:
+                    yield mm[pos:newline]
+                pos = newline + 1
+
+
+def iter_line_ranges(
+    file_path: str,
+    range_size: int,
+    start: int = 0,
+    end: Optional[int] = None,
+) -> Iterator[Tuple[int, int]]:
+    """
+    Split a file into newline-aligned byte ranges of roughly range_size bytes
+    (memory-maps the file and only searches for the next newline after each
+    boundary, so the file itself is never scanned here)
+    
+    Args:
+        file_path: Path to input file
+        range_size: Target number of bytes per range
+        start: Offset of the first range (beginning of a line)
+        end: Offset to split up to (after a newline or EOF; None = EOF)
+    
+    Yields:
+        (start, end) byte offsets; every range ends after a newline or at EOF
+    """
+    size = os.path.getsize(file_path) if end is None else end
+    if size <= start:
+        return  # Nothing to split (mmap cannot map an empty file)
+    with open(file_path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            while start < size:
+                # Move the boundary to the end of the current line
+                newline = mm.find(b"\n", min(start + range_size, size), size)
+                end = size if newline == -1 else newline + 1
+                yield start, end
+                start = end
+
+
+def read_line_range(file_path: str, start: int, end: int) -> List[bytes]:
+    """
+    Read the lines of one byte range from a memory-mapped file
+    
+    Args:
+        file_path: Path to input file
+        start: Start offset (beginning of a line)
+        end: End offset (after a newline or EOF)
+    
+    Returns:
+        Non-empty lines as bytes, without the trailing newline
+    """
+    with open(file_path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            data = mm[start:end]
+    return [line for line in data.split(b"\n") if line]
+
+
+def prefetch_file(file_path: str):
+    """
+    Ask the kernel to start reading a whole file into the page cache in the
+    background (POSIX_FADV_WILLNEED), so a file read after the current one is
+    already in memory when its turn comes. No-op where unsupported.
+    
+    Args:
+        file_path: Path to the file that will be read next
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        fd = os.open(file_path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def count_lines(file_path: str, chunk_size: int = READ_CHUNK_SIZE) -> int:
+    """
+    Count the non-empty lines of a file (the lines iter_lines yields) by
+    counting newlines block by block, minus those that end a blank line
+    (no per-line work; the blank-line regex only runs on blocks holding one)
+    
+    Args:
+        file_path: Path to input file
+        chunk_size: Number of bytes to read per block
+    
+    Returns:
+        Number of non-empty lines, including a last line without a trailing newline
+    """
+    count = 0
+    last = b"\n"  # A newline at the start of the file ends a blank line
+    with open(file_path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            count += chunk.count(b"\n")
+            if last == b"\n" and chunk[:1] == b"\n":
+                count -= 1
+            if b"\n\n" in chunk:
+                count -= len(_BLANK_LINE_RE.findall(chunk))
+            last = chunk[-1:]
+    return count + (last != b"\n")
+
+
+def append_file(out_f, file_path: str):
+    """
+    Append a whole file to an open binary output file, in the kernel
+    (os.sendfile) where available, adding a newline if its last line lacks one
+    
+    Bytes are copied as-is: any blank lines come along, and are skipped by
+    iter_lines / count_lines like in the source file. If sendfile fails
+    (e.g. unsupported by the file systems involved), the rest of the file
+    is copied with shutil.copyfileobj.
+    
+    Args:
+        out_f: Output file opened in binary write/append mode
+        file_path: Path to the file to copy
+    """
+    out_f.flush()  # Buffered bytes must land before the copied ones
+    with open(file_path, "rb") as f_in:
+        size = os.fstat(f_in.fileno()).st_size
+        if size == 0:
+            return
+        offset = 0
+        if hasattr(os, "sendfile"):
+            try:
+                while offset < size:
+                    sent = os.sendfile(out_f.fileno(), f_in.fileno(), offset, size - offset)
+                    if sent == 0:
+                        break
+                    offset += sent
+            except OSError:
+                pass
+        if offset < size:
+            f_in.seek(offset)
+            shutil.copyfileobj(f_in, out_f, WRITE_BUFFER_SIZE)
+        f_in.seek(size - 1)
+        if f_in.read(1) != b"\n":
+            out_f.write(b"\n")
+
+
+def write_lines(out_f, lines: Iterable[bytes]):
+    """
+    Write lines to a binary file, newline-terminated, joining WRITE_BATCH_LINES
+    of them per write call (no per-line write or `line + b"\\n"` copy)
+    
+    Args:
+        out_f: Output file opened in binary mode
+        lines: Lines as bytes, without trailing newlines
+    """
+    lines = iter(lines)
+    while True:
+        batch = list(islice(lines, WRITE_BATCH_LINES))
+        if not batch:
+            break
+        batch.append(b"")  # Trailing newline after the last line
+        out_f.write(b"\n".join(batch))
+
+
+def iter_jsonl(file_path: str) -> Iterator[Dict]:
+    """
+    Parse a JSONL file with orjson, skipping blank and malformed lines
+    
+    Args:
+        file_path: Path to JSONL file
+    
+    Yields:
+        Parsed JSON object for each valid line
+    """
+    for line in iter_lines(file_path):
+        try:
+            yield orjson.loads(line)
+        except orjson.JSONDecodeError:
+            continue
+
+
+def imap_bounded(pool, func, iterable, max_pending: int):
+    """
+    Ordered imap that keeps at most max_pending tasks in flight
+    (Pool.imap would consume the whole input iterator up front)
+    
+    Args:
+        pool: multiprocessing Pool
+        func: Picklable function applied to each item
+        iterable: Input items (e.g. line ranges of a JSONL file)
+        max_pending: Maximum number of submitted, unconsumed tasks
+    
+    Yields:
+        func(item) for each item, in input order
+    """
+    pending = deque()
+    for item in iterable:
+        pending.append(pool.apply_async(func, (item,)))
+        if len(pending) >= max_pending:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+
+_PREFETCH_DONE = object()
+
+
+def prefetch(iterable: Iterable, max_pending: int) -> Iterator:
+    """
+    Iterate on a background thread, keeping up to max_pending items ready.
+    Overlaps the source's I/O (HF streaming network reads and decompression,
+    file reads), done mostly in C without the GIL, with the consumer's work.
+    
+    Args:
+        iterable: Source iterable (e.g. a streaming dataset or a chunk reader)
+        max_pending: Maximum number of items buffered ahead of the consumer
+    
+    Yields:
+        Items of iterable in order (producer exceptions are re-raised here)
+    """
+    q = queue.Queue(maxsize=max_pending)
+    stop = threading.Event()
+    
+    def put(entry) -> bool:
+        # Give up once the consumer has stopped reading (e.g. max_examples reached)
+        while not stop.is_set():
+            try:
+                q.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def produce():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+        except Exception as e:
+            put((None, e))
+            return
+        put(_PREFETCH_DONE)
+    
+    threading.Thread(target=produce, daemon=True).start()
+    try:
+        while True:
+            entry = q.get()
+            if entry is _PREFETCH_DONE:
+                return
+            item, error = entry
+            if error is not None:
+                raise error
+            yield item
+    finally:
+        stop.set()
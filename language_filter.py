@@ -2,42 +2,113 @@
 Language detection and filtering module
 Filters texts to only include specified languages using fasttext
 """
+import hashlib
 import os
-from typing import Tuple, Optional
+import re
+from collections import OrderedDict
+from typing import List, Tuple, Optional
 from config import config
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# 64-bit XXH3 digest of each language-ID sample, used as its cache key.
+# Falls back to an 8-byte BLAKE2b digest when xxhash is not installed.
+try:
+    from xxhash import xxh3_64_intdigest as _sample_key
+except ImportError:
+    def _sample_key(data: bytes) -> bytes:
+        return hashlib.blake2b(data, digest_size=8).digest()
+
+
+MODEL_BASE_URL = "https://dl.fbaipublicfiles.com/fasttext/supervised-models/"
+
+# Bytes per read while downloading / hashing the model
+DOWNLOAD_BLOCK_SIZE = 1024 * 1024
 
 # Global language model (lazy loading)
 _lang_model = None
 _model_download_attempted = False
 
+# Predictions by 64-bit digest of the language-ID sample: repeated/boilerplate
+# documents skip fasttext. Least recently used entries are evicted past
+# config.lang_cache_size.
+_prediction_cache = OrderedDict()
+
+
+def _sha256_file(file_path: str) -> str:
+    """SHA256 hex digest of a file, read in DOWNLOAD_BLOCK_SIZE blocks"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(DOWNLOAD_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
 
 def _download_language_model(model_path: str) -> bool:
     """
     Download fasttext language model from official source
     
+    Streams into "<model_path>.part" and renames it only once complete (and,
+    if config.lang_model_sha256 is set, verified), so an interrupted download
+    never leaves a truncated model for load_model. A leftover .part file is
+    resumed with an HTTP Range request.
+    
     Args:
         model_path: Path where to save the model
         
     Returns:
         True if download successful, False otherwise
     """
+    import urllib.error
     import urllib.request
     import sys
     
-    model_url = "https://dl.fbaipublicfiles.com/fasttext/supervised-models/lid.176.bin"
+    # Download whichever model the path names (lid.176.ftz by default, ~1 MB;
+    # lid.176.bin is the ~126 MB unquantized model)
+    model_url = MODEL_BASE_URL + os.path.basename(model_path)
+    part_path = model_path + ".part"
     
     try:
         print(f"Downloading language model from {model_url}...")
-        print("This may take a few minutes (~1.3 GB)...")
         
-        def show_progress(block_num, block_size, total_size):
-            downloaded = block_num * block_size
-            percent = min(100, (downloaded / total_size) * 100)
-            sys.stdout.write(f"\rProgress: {percent:.1f}% ({downloaded / (1024*1024):.1f} MB / {total_size / (1024*1024):.1f} MB)")
-            sys.stdout.flush()
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+        try:
+            with urllib.request.urlopen(urllib.request.Request(model_url, headers=headers)) as response:
+                if offset and response.status != 206:
+                    offset = 0  # Server ignored the range: start over
+                total_size = offset + int(response.headers.get("Content-Length", 0))
+                downloaded = offset
+                
+                with open(part_path, "ab" if offset else "wb") as f:
+                    for block in iter(lambda: response.read(DOWNLOAD_BLOCK_SIZE), b""):
+                        f.write(block)
+                        downloaded += len(block)
+                        if total_size:
+                            percent = min(100, (downloaded / total_size) * 100)
+                            sys.stdout.write(f"\rProgress: {percent:.1f}% ({downloaded / (1024*1024):.1f} MB / {total_size / (1024*1024):.1f} MB)")
+                            sys.stdout.flush()
+                
+                if total_size and downloaded != total_size:
+                    raise IOError(f"incomplete download ({downloaded:,}/{total_size:,} bytes)")
+        except urllib.error.HTTPError as e:
+            # 416: the .part file already holds the whole model
+            if not (offset and e.code == 416):
+                raise
+        
+        if config.lang_model_sha256 and _sha256_file(part_path) != config.lang_model_sha256.lower():
+            os.remove(part_path)
+            raise IOError("SHA256 mismatch, discarded the downloaded file")
         
-        urllib.request.urlretrieve(model_url, model_path, show_progress)
+        os.replace(part_path, model_path)
         print(f"\nModel downloaded successfully to {model_path}")
         return True
     except Exception as e:
@@ -45,25 +116,124 @@ def _download_language_model(model_path: str) -> bool:
         return False
 
 
-def load_language_model(model_path: Optional[str] = None):
+def _download_language_model_locked(model_path: str) -> bool:
     """
-    Load fasttext language detection model
+    Download the model while holding an exclusive lock on "<model_path>.lock",
+    so concurrent processes don't download it at the same time: the first one
+    downloads, the others wait and then find the finished file
     
     Args:
-        model_path: Path to fasttext model file (default: from config)
+        model_path: Path where to save the model
+        
+    Returns:
+        True if the model is in place, False otherwise
     """
-    global _lang_model, _model_download_attempted
+    if fcntl is None:
+        # No advisory locks on this platform (e.g. Windows)
+        return _download_language_model(model_path)
     
-    if _lang_model is not None:
-        return _lang_model
+    with open(model_path + ".lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            if os.path.exists(model_path):
+                return True  # Downloaded by another process while we waited
+            return _download_language_model(model_path)
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class _RustFastTextModel:
+    """
+    Adapter for the pure-Rust FastText inference in underthesea_core,
+    exposing the same predict() return shape as the fasttext package
+    
+    The (label, probability) pairs underthesea_core returns are checked once
+    on load, so a version with a different return shape fails there (and
+    load_language_model falls back to fasttext) instead of on every batch.
+    The library's batch predict is used when it has one.
+    """
+    
+    # Probe text for the return-shape check on load
+    _PROBE_TEXT = "this is a short english sentence"
+    
+    def __init__(self, model_path: str):
+        from underthesea_core import FastText
+        self._model = FastText.load(model_path)
+        self._predict_batch = getattr(self._model, "predict_batch", None)
+        
+        self._predict_one(self._PROBE_TEXT, 1)
+        if self._predict_batch is not None:
+            batch = self._predict_batch([self._PROBE_TEXT], k=1)
+            if not isinstance(batch, (list, tuple)) or len(batch) != 1:
+                raise ValueError(f"unexpected predict_batch() return value: {batch!r}")
+            self._split_pairs(batch[0])
+    
+    @staticmethod
+    def _split_pairs(pairs):
+        """Split (label, probability) pairs into fasttext's (labels, probs) shape"""
+        if not isinstance(pairs, (list, tuple)) or not all(
+            isinstance(pair, (list, tuple)) and len(pair) == 2 and isinstance(pair[0], str)
+            for pair in pairs
+        ):
+            raise ValueError(f"unexpected predict() return value: {pairs!r}")
+        return tuple(label for label, _ in pairs), [float(prob) for _, prob in pairs]
+    
+    def _predict_one(self, text: str, k: int):
+        return self._split_pairs(self._model.predict(text, k=k))
     
+    def predict(self, text, k: int = 1):
+        if isinstance(text, list):
+            if self._predict_batch is not None:
+                results = [self._split_pairs(pairs) for pairs in self._predict_batch(text, k=k)]
+            else:
+                results = [self._predict_one(t, k) for t in text]
+            return [labels for labels, _ in results], [probs for _, probs in results]
+        return self._predict_one(text, k)
+
+
+def _get_fasttext_loader():
+    """Return fasttext.load_model (from the fasttext or fasttext-predict package)"""
     try:
         import fasttext
     except ImportError:
         raise ImportError(
             "fasttext is required for language detection. "
-            "Install with: pip install fasttext"
+            "Install with: pip install fasttext-predict"
         )
+    return fasttext.load_model
+
+
+def _get_model_loader():
+    """
+    Return the model loader for the configured backend: underthesea_core
+    Rust inference if config.lang_rust_backend is set and it is installed,
+    otherwise the fasttext or fasttext-predict package
+    """
+    if config.lang_rust_backend:
+        try:
+            import underthesea_core
+            if hasattr(underthesea_core, "FastText"):
+                return _RustFastTextModel
+            print("⚠️  underthesea_core has no FastText, using fasttext for language ID")
+        except ImportError:
+            print("⚠️  underthesea_core is not installed, using fasttext for language ID")
+    
+    return _get_fasttext_loader()
+
+
+def load_language_model(model_path: Optional[str] = None):
+    """
+    Load fasttext language detection model
+    
+    Args:
+        model_path: Path to fasttext model file (default: from config)
+    """
+    global _lang_model, _model_download_attempted
+    
+    if _lang_model is not None:
+        return _lang_model
+    
+    load_model = _get_model_loader()
     
     model_path = model_path or config.lang_model_path
     
@@ -72,14 +242,14 @@ def load_language_model(model_path: Optional[str] = None):
         if not _model_download_attempted:
             _model_download_attempted = True
             print(f"Language model not found at {model_path}")
-            if _download_language_model(model_path):
+            if _download_language_model_locked(model_path):
                 # Model downloaded successfully, continue to load
                 pass
             else:
                 raise FileNotFoundError(
                     f"Failed to download language model. "
                     f"Please download manually from: "
-                    f"https://dl.fbaipublicfiles.com/fasttext/supervised-models/lid.176.bin "
+                    f"{MODEL_BASE_URL}{os.path.basename(model_path)} "
                     f"and place it at {model_path}"
                 )
         else:
@@ -90,10 +260,33 @@ def load_language_model(model_path: Optional[str] = None):
             )
     
     # Load the model
-    _lang_model = fasttext.load_model(model_path)
+    if load_model is _RustFastTextModel:
+        try:
+            _lang_model = _RustFastTextModel(model_path)
+            return _lang_model
+        except (OSError, ValueError) as e:
+            print(f"⚠️  underthesea_core FastText unusable ({e}), using fasttext for language ID")
+            load_model = _get_fasttext_loader()
+    _lang_model = load_model(model_path)
     return _lang_model
 
 
+# Characters of each text fasttext sees
+LANGUAGE_SAMPLE_SIZE = 1000
+
+
+def _language_sample(text: str) -> str:
+    """
+    fasttext input for a text: its first LANGUAGE_SAMPLE_SIZE chars with
+    newlines replaced (fasttext predicts one line at a time)
+    
+    Sliced first, so replace() only copies the sample window. replace() is a
+    memchr-driven scan; str.translate is ~100x slower on non-ASCII (Turkish)
+    text, so other whitespace is left as is (fasttext splits on it anyway).
+    """
+    return text[:LANGUAGE_SAMPLE_SIZE].replace("\n", " ")
+
+
 def detect_language(text: str, model_path: Optional[str] = None) -> Tuple[str, float]:
     """
     Detect language of text using fasttext
@@ -107,10 +300,10 @@ def detect_language(text: str, model_path: Optional[str] = None) -> Tuple[str, f
     """
     model = load_language_model(model_path)
     
-    # Prepare text (first 1000 chars, replace newlines)
-    text_sample = text.replace("\n", " ")[:1000]
+    text_sample = _language_sample(text)
     
-    if not text_sample.strip():
+    # isspace() tests in place (strip() would copy the sample)
+    if not text_sample or text_sample.isspace():
         return "unknown", 0.0
     
     # Predict language
@@ -123,6 +316,84 @@ def detect_language(text: str, model_path: Optional[str] = None) -> Tuple[str, f
     return lang, confidence
 
 
+def detect_language_batch(texts: List[str], model_path: Optional[str] = None) -> List[Tuple[str, float]]:
+    """
+    Detect language of many texts with a single fasttext predict call
+    (one Python/C boundary crossing per batch instead of per text).
+    Samples predicted before in this process are answered from the cache.
+    
+    Args:
+        texts: Input texts
+        model_path: Path to fasttext model (optional)
+        
+    Returns:
+        List of (language_code, confidence_score), aligned with texts
+    """
+    model = load_language_model(model_path)
+    
+    samples = [_language_sample(text) for text in texts]
+    
+    results = [("unknown", 0.0)] * len(texts)
+    cache = _prediction_cache
+    cache_size = config.lang_cache_size
+    
+    # Samples still to predict, one entry per distinct key
+    pending = {}
+    for i, sample in enumerate(samples):
+        if not sample or sample.isspace():
+            continue
+        key = _sample_key(sample.encode("utf-8", "surrogatepass"))
+        cached = cache.get(key)
+        if cached is not None:
+            cache.move_to_end(key)
+            results[i] = cached
+        else:
+            pending.setdefault(key, []).append(i)
+    
+    if not pending:
+        return results
+    
+    # Predict languages for all uncached samples at once
+    keys = list(pending)
+    labels, probs = model.predict([samples[pending[key][0]] for key in keys], k=1)
+    
+    for key, label, prob in zip(keys, labels, probs):
+        # Extract language code (remove __label__ prefix)
+        prediction = (label[0].replace("__label__", ""), float(prob[0]))
+        for i in pending[key]:
+            results[i] = prediction
+        if cache_size > 0:
+            if len(cache) >= cache_size:
+                cache.popitem(last=False)
+            cache[key] = prediction
+    
+    return results
+
+
+# CJK Unified Ideographs (U+4E00 to U+9FFF) and CJK Extension A (U+3400 to U+4DBF),
+# matched by the regex engine in C instead of an ord() loop per character
+_CJK_RE = re.compile("[\u3400-\u4DBF\u4E00-\u9FFF]")
+
+# From this length on, one vectorized NumPy pass over the code points is cheaper
+# than the regex scan (below it, encoding + array setup dominates)
+_NUMPY_MIN_LENGTH = 1024
+
+if np is not None:
+    # Whitespace lookup table (same set as str.split(); all of it is <= U+3000).
+    # Code points above the table are clamped onto its last, False, entry.
+    _WHITESPACE_LUT = np.array([chr(c).isspace() for c in range(0x3002)], dtype=bool)
+
+
+def _codepoints(text: str):
+    """Code points of text as a uint32 array (surrogates kept as-is)"""
+    return np.frombuffer(text.encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+
+
+def _cjk_mask(codepoints):
+    """Boolean mask of CJK code points (unsigned wrap-around turns each range check into one compare)"""
+    return ((codepoints - 0x3400) <= 0x4DBF - 0x3400) | ((codepoints - 0x4E00) <= 0x9FFF - 0x4E00)
+
+
 def has_chinese_characters(text: str) -> bool:
     """
     Check if text contains Chinese characters (CJK unified ideographs)
@@ -133,13 +404,9 @@ def has_chinese_characters(text: str) -> bool:
     Returns:
         True if text contains Chinese characters
     """
-    # CJK Unified Ideographs range: U+4E00 to U+9FFF
-    # Also includes CJK Extension A: U+3400 to U+4DBF
-    for char in text:
-        code_point = ord(char)
-        if (0x4E00 <= code_point <= 0x9FFF) or (0x3400 <= code_point <= 0x4DBF):
-            return True
-    return False
+    if np is None or len(text) < _NUMPY_MIN_LENGTH:
+        return _CJK_RE.search(text) is not None
+    return bool(_cjk_mask(_codepoints(text)).any())
 
 
 def chinese_character_ratio(text: str) -> float:
@@ -152,23 +419,68 @@ def chinese_character_ratio(text: str) -> float:
     Returns:
         Ratio of Chinese characters (0.0 to 1.0)
     """
-    if not text:
-        return 0.0
+    if np is None or len(text) < _NUMPY_MIN_LENGTH:
+        # Most documents contain no CJK at all: one C-level scan settles them
+        if _CJK_RE.search(text) is None:
+            return 0.0
+        
+        chinese_count = len(_CJK_RE.findall(text))
+        # Non-whitespace characters (same whitespace set as str.strip())
+        total_chars = sum(map(len, text.split()))
+        
+        return chinese_count / total_chars
     
-    chinese_count = 0
-    total_chars = 0
+    codepoints = _codepoints(text)
+    chinese_count = np.count_nonzero(_cjk_mask(codepoints))
+    if not chinese_count:
+        return 0.0
     
-    for char in text:
-        if char.strip():  # Skip whitespace
-            total_chars += 1
-            code_point = ord(char)
-            if (0x4E00 <= code_point <= 0x9FFF) or (0x3400 <= code_point <= 0x4DBF):
-                chinese_count += 1
+    whitespace = np.count_nonzero(_WHITESPACE_LUT[np.minimum(codepoints, _WHITESPACE_LUT.size - 1)])
+    return chinese_count / (codepoints.size - whitespace)
+
+
+# Latin-script code points: Basic Latin through Latin Extended-B (U+0000-U+024F,
+# covers Turkish) and Latin Extended Additional (U+1E00-U+1EFF)
+_NON_LATIN_RE = re.compile("[^\\s\u0000-\u024F\u1E00-\u1EFF]")
+
+# Allowed languages written in Latin script (enables the Latin fast path)
+_LATIN_SCRIPT_LANGUAGES = frozenset({
+    "en", "tr", "de", "fr", "es", "it", "pt", "nl", "pl", "cs", "ro", "sv",
+    "da", "no", "fi", "hu", "id", "ms", "vi", "az", "uz", "ca", "hr", "sk",
+})
+
+# Latin fast path: minimum text length and share of Latin non-whitespace characters
+_LATIN_FASTPATH_MIN_LENGTH = 200
+_LATIN_FASTPATH_RATIO = 0.95
+
+
+def _script_counts(text: str) -> Tuple[int, int, int]:
+    """
+    Single-pass script histogram of the non-whitespace characters
     
-    if total_chars == 0:
-        return 0.0
+    Args:
+        text: Input text
+        
+    Returns:
+        Tuple of (non_whitespace_count, latin_count, cjk_count)
+    """
+    if np is None or len(text) < _NUMPY_MIN_LENGTH:
+        total_chars = sum(map(len, text.split()))
+        non_latin = _NON_LATIN_RE.findall(text)
+        if not non_latin:
+            return total_chars, total_chars, 0
+        # CJK is a subset of the non-Latin characters
+        cjk_count = len(_CJK_RE.findall("".join(non_latin)))
+        return total_chars, total_chars - len(non_latin), cjk_count
     
-    return chinese_count / total_chars
+    codepoints = _codepoints(text)
+    non_whitespace = ~_WHITESPACE_LUT[np.minimum(codepoints, _WHITESPACE_LUT.size - 1)]
+    latin = (codepoints <= 0x024F) | ((codepoints - 0x1E00) <= 0x1EFF - 0x1E00)
+    return (
+        int(np.count_nonzero(non_whitespace)),
+        int(np.count_nonzero(latin & non_whitespace)),
+        int(np.count_nonzero(_cjk_mask(codepoints))),
+    )
 
 
 def language_filter(text: str, model_path: Optional[str] = None) -> bool:
@@ -182,17 +494,53 @@ def language_filter(text: str, model_path: Optional[str] = None) -> bool:
     Returns:
         True if text is in allowed language with sufficient confidence
     """
-    # Reject texts with Chinese characters if configured
-    if config.reject_chinese_chars:
-        chinese_ratio = chinese_character_ratio(text)
-        if chinese_ratio > 0.1:  # More than 10% Chinese characters
-            return False
+    # Same checks as the batched path (a batch of one)
+    return language_filter_batch([text], model_path)[0]
+
+
+def language_filter_batch(texts: List[str], model_path: Optional[str] = None) -> List[bool]:
+    """
+    Batched version of language_filter: same checks, one fasttext call per batch
+    
+    Args:
+        texts: Input texts
+        model_path: Path to fasttext model (optional)
+        
+    Returns:
+        List of booleans aligned with texts (True = allowed language)
+    """
+    results = [False] * len(texts)
+    reject_chinese = config.reject_chinese_chars
+    allowed_languages = frozenset(config.allowed_languages)
+    latin_fastpath = config.lang_latin_fastpath and not allowed_languages.isdisjoint(_LATIN_SCRIPT_LANGUAGES)
+    
+    candidates = []
+    for i, text in enumerate(texts):
+        if latin_fastpath and len(text) >= _LATIN_FASTPATH_MIN_LENGTH:
+            # One script histogram answers both the CJK check and the fast path
+            total_chars, latin_count, cjk_count = _script_counts(text)
+            if reject_chinese and cjk_count > 0.1 * total_chars:
+                continue
+            if total_chars and latin_count >= _LATIN_FASTPATH_RATIO * total_chars:
+                results[i] = True  # Latin-script text: accepted without fasttext
+                continue
+        # Reject texts with Chinese characters if configured
+        elif reject_chinese and chinese_character_ratio(text) > 0.1:
+            continue
+        candidates.append(i)
+    
+    if not candidates:
+        return results
     
     try:
-        lang, prob = detect_language(text, model_path)
-        return (lang in config.allowed_languages) and (prob >= config.min_lang_confidence)
+        predictions = detect_language_batch([texts[i] for i in candidates], model_path)
     except Exception as e:
-        # If language detection fails, skip the text for safety
+        # If language detection fails, skip the texts for safety
         print(f"Language detection error: {e}")
-        return False
-
+        return results
+    
+    min_confidence = config.min_lang_confidence
+    for i, (lang, prob) in zip(candidates, predictions):
+        results[i] = (lang in allowed_languages) and (prob >= min_confidence)
+    
+    return results
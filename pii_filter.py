@@ -3,9 +3,227 @@ PII (Personally Identifiable Information) filtering module
 Removes texts containing sensitive personal information
 """
 import re
-from typing import List, Optional
+from functools import lru_cache
+from typing import List, Optional, Tuple
 from config import config
 
+# Hyperscan compiles all PII patterns into one automaton and scans UTF-8 bytes
+# without backtracking. Its \d/\s/\b and case folding differ from Python re,
+# so it runs a widened (superset) version of the patterns as a prefilter and
+# re confirms the rare hits: results are identical to the re-only path.
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+@lru_cache(maxsize=8)
+def _compile_pii_patterns(patterns: Tuple[str, ...]) -> "re.Pattern":
+    """
+    Compile PII patterns into a single case-insensitive alternation,
+    so each text is scanned once instead of once per pattern
+    
+    Args:
+        patterns: Tuple of regex patterns (tuple so it can be cached)
+        
+    Returns:
+        Compiled regex matching any of the patterns
+    """
+    return re.compile("|".join(f"(?:{p})" for p in patterns), re.IGNORECASE)
+
+
+# Python re (Unicode, IGNORECASE) matches a few more characters than Hyperscan
+_HS_WHITESPACE = r"\s\p{Z}\x{1c}-\x{1f}\x{85}"  # Everything str.isspace() accepts
+
+
+@lru_cache(maxsize=1)
+def _case_fold_extras() -> str:
+    """
+    Non-ASCII characters re.IGNORECASE matches to an ASCII letter (İ, ı, ſ
+    and the Kelvin sign K), taken from one scan over all code points so the
+    list follows the running Python's case-fold tables
+    """
+    all_chars = "".join(map(chr, range(0x80, 0x110000)))
+    return "".join(re.findall("[a-z]", all_chars, re.IGNORECASE))
+
+
+def _hs_fold_extras(re_class: str) -> str:
+    """
+    Hyperscan escapes of the case-fold extras the re character class
+    (e.g. "[A-Z]" or "k") matches under re.IGNORECASE
+    """
+    return "".join(
+        f"\\x{{{ord(c):x}}}" for c in _case_fold_extras() if re.fullmatch(re_class, c, re.IGNORECASE)
+    )
+
+
+def _widen_for_hyperscan(pattern: str) -> Optional[str]:
+    """
+    Rewrite a PII pattern into a Hyperscan pattern matching at least
+    everything the re pattern matches (word boundaries dropped, Unicode
+    digit/whitespace classes, and the non-ASCII characters re.IGNORECASE
+    folds to a letter, e.g. ſ and K, added wherever that letter can match)
+    
+    Args:
+        pattern: Python regex pattern
+        
+    Returns:
+        Widened pattern, or None if it uses syntax not handled here
+    """
+    if not pattern.isascii():
+        return None
+    
+    out = []
+    i = 0
+    n = len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == "[":
+            # Character class: copy up to the closing bracket, widening escapes
+            j = i + 1
+            if j < n and pattern[j] == "^":
+                j += 1
+            body = []
+            if j < n and pattern[j] == "]":
+                body.append(r"\]")  # A leading "]" is a literal
+                j += 1
+            while j < n and pattern[j] != "]":
+                if pattern[j] == "\\":
+                    esc = pattern[j + 1:j + 2]
+                    if esc == "d":
+                        body.append(r"\p{Nd}")
+                    elif esc == "s":
+                        body.append(_HS_WHITESPACE)
+                    elif not esc or esc.isalnum():
+                        return None
+                    else:
+                        body.append(pattern[j:j + 2])
+                    j += 2
+                elif pattern[j] == "-" and (not body or pattern[j + 1:j + 2] == "]"):
+                    body.append(r"\-")  # Literal "-": keep it literal once more is appended
+                    j += 1
+                else:
+                    body.append(pattern[j])
+                    j += 1
+            if j >= n:
+                return None
+            head = pattern[i:i + 2] if pattern[i + 1:i + 2] == "^" else "["
+            cls = "".join(body)
+            if head == "[":
+                cls += _hs_fold_extras(f"[{pattern[i + 1:j]}]")
+            out.append(head + cls + "]")
+            i = j + 1
+        elif c == "\\":
+            esc = pattern[i + 1:i + 2]
+            if esc == "b":
+                pass  # A zero-width assertion: dropping it only adds matches
+            elif esc == "d":
+                out.append(r"\p{Nd}")
+            elif esc == "s":
+                out.append(f"[{_HS_WHITESPACE}]")
+            elif not esc or esc.isalnum():
+                return None
+            else:
+                out.append(pattern[i:i + 2])
+            i += 2
+        elif c == "(" and pattern[i + 1:i + 2] == "?" and pattern[i + 2:i + 3] != ":":
+            return None  # Lookarounds, inline flags, named groups
+        elif c.isalpha():
+            extras = _hs_fold_extras(c)
+            out.append(f"[{c}{extras}]" if extras else c)
+            i += 1
+        else:
+            out.append(c)
+            i += 1
+    return "".join(out)
+
+
+@lru_cache(maxsize=8)
+def _compile_pii_hyperscan(patterns: Tuple[str, ...]):
+    """
+    Compile the widened PII patterns into a Hyperscan prefilter database
+    
+    Args:
+        patterns: Tuple of regex patterns (tuple so it can be cached)
+        
+    Returns:
+        Hyperscan database, or None if unavailable or a pattern is unsupported
+    """
+    if hyperscan is None:
+        return None
+    
+    widened = [_widen_for_hyperscan(p) for p in patterns]
+    if None in widened:
+        return None
+    
+    flags = hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH | hyperscan.HS_FLAG_UTF8
+    try:
+        db = hyperscan.Database()
+        db.compile(
+            expressions=[p.encode("utf-8") for p in widened],
+            ids=list(range(len(widened))),
+            elements=len(widened),
+            flags=[flags] * len(widened),
+        )
+    except hyperscan.error:
+        return None
+    return db
+
+
+# Raised by newer python-hyperscan when a match handler stops the scan
+_HS_SCAN_TERMINATED = getattr(hyperscan, "ScanTerminated", ())
+
+
+def _on_pii_match(pattern_id, start, end, flags, hits):
+    """Hyperscan match handler: record the hit and stop scanning"""
+    hits.append(pattern_id)
+    return True
+
+
+def _hyperscan_has_match(db, data: bytes) -> bool:
+    """Return True if any pattern in db matches data"""
+    hits = []
+    try:
+        db.scan(data, match_event_handler=_on_pii_match, context=hits)
+    except _HS_SCAN_TERMINATED:
+        pass
+    return bool(hits)
+
+
+# Compiled matchers for config.pii_patterns and the copy of the list they were
+# built from: the default path compares lists instead of building a tuple key
+# and doing two cache lookups per text
+_default_patterns: Optional[List[str]] = None
+_default_matchers = None
+
+
+def _get_pii_matchers(custom_patterns: Optional[List[str]] = None):
+    """
+    Get the compiled (regex, hyperscan_db_or_None) pair for the given patterns
+    
+    Args:
+        custom_patterns: Optional custom PII patterns (default: from config)
+        
+    Returns:
+        Tuple of (compiled alternation, Hyperscan prefilter database or None)
+    """
+    global _default_patterns, _default_matchers
+    
+    if custom_patterns:
+        patterns = tuple(custom_patterns)
+        return _compile_pii_patterns(patterns), _compile_pii_hyperscan(patterns)
+    
+    # Rebuilt only when config.pii_patterns has been changed
+    if config.pii_patterns != _default_patterns:
+        patterns = tuple(config.pii_patterns)
+        _default_matchers = (_compile_pii_patterns(patterns), _compile_pii_hyperscan(patterns))
+        _default_patterns = list(patterns)
+    return _default_matchers
+
+
+# Compile the default patterns at import time, so forked workers inherit
+# the compiled regex instead of each building it on first use
+_get_pii_matchers()
+
 
 def pii_filter(text: str, custom_patterns: Optional[List[str]] = None) -> bool:
     """
@@ -18,13 +236,20 @@ def pii_filter(text: str, custom_patterns: Optional[List[str]] = None) -> bool:
     Returns:
         True if text does NOT contain PII, False if PII found
     """
-    patterns = custom_patterns or config.pii_patterns
+    regex, db = _get_pii_matchers(custom_patterns)
     
-    for pattern in patterns:
-        if re.search(pattern, text, re.IGNORECASE):
-            return False  # PII found, reject text
+    # PII found -> reject text, no PII -> accept text
+    if db is not None:
+        try:
+            data = text.encode("utf-8")
+        except UnicodeEncodeError:
+            pass  # Lone surrogates: let re handle it
+        else:
+            if not _hyperscan_has_match(db, data):
+                return True  # Prefilter is a superset: no hit means no PII
     
-    return True  # No PII found, accept text
+    # Confirm prefilter hits (or scan without Hyperscan) with re
+    return regex.search(text) is None
 
 
 def remove_pii_from_text(text: str, replacement: str = "[REDACTED]") -> str:
@@ -38,13 +263,8 @@ def remove_pii_from_text(text: str, replacement: str = "[REDACTED]") -> str:
     Returns:
         Text with PII replaced
     """
-    patterns = config.pii_patterns
-    cleaned_text = text
-    
-    for pattern in patterns:
-        cleaned_text = re.sub(pattern, replacement, cleaned_text, flags=re.IGNORECASE)
-    
-    return cleaned_text
+    # One pass with the combined pattern instead of one re.sub per pattern
+    return _get_pii_matchers()[0].sub(replacement, text)
 
 
 # Canary string for testing
@@ -2,13 +2,16 @@
 Main pipeline module
 Combines all processing steps into a single pipeline
 """
-import json
+import io
 import os
 import random
+from itertools import islice
 from typing import Iterator, Dict, Optional, List, Tuple
 from pathlib import Path
 import multiprocessing as mp
 
+import orjson
+
 from config import (
     config,
     DATASET_MIX,
@@ -17,10 +20,28 @@ from config import (
     LANGUAGE_FILTER_BY_SOURCE,
 )
 from basic_cleaner import clean_and_filter
-from language_filter import language_filter
-from deduplication import get_deduplicator, reset_deduplicator
+from language_filter import language_filter, language_filter_batch, load_language_model
+from deduplication import (
+    get_deduplicator,
+    reset_deduplicator,
+    get_shard_id,
+    create_shared_exact_bloom,
+    attach_shared_exact_bloom,
+)
 from pii_filter import pii_filter
 from quality_filter import quality_filter
+from jsonl_io import (
+    iter_lines,
+    iter_line_ranges,
+    read_line_range,
+    count_lines,
+    append_file,
+    prefetch_file,
+    write_lines,
+    imap_bounded,
+    prefetch,
+    WRITE_BUFFER_SIZE,
+)
 
 # Quality module (optional, for advanced risk scoring)
 try:
@@ -31,6 +52,97 @@ except ImportError:
     print("Warning: Quality module not available. Advanced risk scoring disabled.")
 
 
+def _filter_before_language(text: str) -> Optional[str]:
+    """
+    Regex-only filters that run before language detection (cleaning, PII)
+    
+    Args:
+        text: Input text
+        
+    Returns:
+        Cleaned text if it passes, None otherwise
+    """
+    # Step 1: Basic cleaning and filtering
+    cleaned = clean_and_filter(text)
+    if cleaned is None:
+        return None
+    
+    # Step 2: PII filter (regex-only, run right after the cleaning regexes
+    # so PII texts are rejected before fasttext and the dedup index)
+    if not pii_filter(cleaned):
+        return None
+    
+    return cleaned
+
+
+def _filter_before_dedup(text: str, language_filter_enabled: bool = True) -> Optional[str]:
+    """
+    Stateless filters that run before deduplication (cleaning, PII, language)
+    
+    Args:
+        text: Input text
+        language_filter_enabled: Whether to apply language filtering
+        
+    Returns:
+        Cleaned text if it passes, None otherwise
+    """
+    # Steps 1-2: cleaning and PII
+    cleaned = _filter_before_language(text)
+    if cleaned is None:
+        return None
+    
+    # Step 3: Language filter
+    if language_filter_enabled:
+        if not language_filter(cleaned):
+            return None
+    
+    return cleaned
+
+
+def _filter_after_dedup(cleaned: str, use_quality_module: Optional[bool] = None) -> bool:
+    """
+    Stateless filters that run after deduplication (quality, risk scoring)
+    
+    Args:
+        cleaned: Text that already passed _filter_before_dedup
+        use_quality_module: Whether to use quality module risk scoring (None = use config default)
+        
+    Returns:
+        True if text passes, False otherwise
+    """
+    # Step 5: Quality filter (basic)
+    if not quality_filter(cleaned):
+        return False
+    
+    # Step 6: Quality module risk scoring (advanced)
+    if use_quality_module is None:
+        use_quality_module = config.use_quality_module
+    
+    if use_quality_module and QUALITY_MODULE_AVAILABLE:
+        return _passes_risk_score(cleaned)
+    
+    return True
+
+
+def _passes_risk_score(cleaned: str) -> bool:
+    """
+    Quality module risk scoring (step 6)
+    
+    Returns:
+        False if the risk score reaches config.quality_risk_threshold, True otherwise
+    """
+    try:
+        risk_score = compute_risk_score(cleaned)
+        if risk_score >= config.quality_risk_threshold:
+            return False  # Drop high-risk content
+    except Exception as e:
+        # If risk scoring fails, log but don't fail the text
+        print(f"Risk scoring error: {e}")
+        # Continue with text (fail-safe)
+    
+    return True
+
+
 def process_text(
     text: str,
     deduplicator=None,
@@ -50,18 +162,15 @@ def process_text(
         
     Returns:
         Processed text if it passes all filters, None otherwise
+    
+    For many texts, build one Pipeline and call its process() instead.
     """
-    # Step 1: Basic cleaning and filtering
-    cleaned = clean_and_filter(text)
+    # Steps 1-3: cleaning, PII, language
+    cleaned = _filter_before_dedup(text, language_filter_enabled)
     if cleaned is None:
         return None
     
-    # Step 2: Language filter
-    if language_filter_enabled:
-        if not language_filter(cleaned):
-            return None
-    
-    # Step 3: Deduplication
+    # Step 4: Deduplication
     if dedup_enabled:
         if deduplicator is None:
             deduplicator = get_deduplicator()
@@ -69,29 +178,322 @@ def process_text(
         if deduplicator.is_duplicate(cleaned):
             return None
     
-    # Step 4: PII filter
-    if not pii_filter(cleaned):
+    # Steps 5-6: quality filter and risk scoring
+    if not _filter_after_dedup(cleaned, use_quality_module):
         return None
     
-    # Step 5: Quality filter (basic)
-    if not quality_filter(cleaned):
-        return None
-    
-    # Step 6: Quality module risk scoring (advanced)
-    if use_quality_module is None:
-        use_quality_module = config.use_quality_module
+    return cleaned
+
+
+def _make_processor(
+    is_duplicate=None,
+    language_filter_enabled: bool = True,
+    use_quality_module: bool = True,
+):
+    """
+    Build process_text specialized for the given flags: the checks after
+    cleaning are assembled once into a tuple, so disabled steps are left out
+    instead of being tested per text
     
+    Args:
+        is_duplicate: Bound Deduplicator.is_duplicate (None = no dedup)
+        language_filter_enabled: Whether to apply language filtering
+        use_quality_module: Whether to use quality module risk scoring
+        
+    Returns:
+        Function mapping a text to its processed text, or None if rejected
+    """
+    checks = [pii_filter]
+    if language_filter_enabled:
+        checks.append(language_filter)
+    if is_duplicate is not None:
+        checks.append(lambda cleaned: not is_duplicate(cleaned))
+    checks.append(quality_filter)
     if use_quality_module and QUALITY_MODULE_AVAILABLE:
+        checks.append(_passes_risk_score)
+    checks = tuple(checks)
+    
+    def process(text: str) -> Optional[str]:
+        cleaned = clean_and_filter(text)
+        if cleaned is None:
+            return None
+        for check in checks:
+            if not check(cleaned):
+                return None
+        return cleaned
+    
+    return process
+
+
+class Pipeline:
+    """
+    process_text with its handles bound once: the deduplicator, the filter
+    flags and the quality setting are resolved in __init__ (into a processor
+    specialized for them) and the language model is loaded up front, so
+    process() does no per-call lookups or flag tests.
+    Same per-text result as process_text.
+    """
+    
+    def __init__(
+        self,
+        deduplicator=None,
+        language_filter_enabled: bool = True,
+        dedup_enabled: bool = True,
+        use_quality_module: Optional[bool] = None,
+    ):
+        """
+        Args:
+            deduplicator: Deduplicator instance (default: the global one, if dedup is enabled)
+            language_filter_enabled: Whether to apply language filtering
+            dedup_enabled: Whether to apply deduplication
+            use_quality_module: Whether to use quality module risk scoring (None = use config default)
+        """
+        if dedup_enabled and deduplicator is None:
+            deduplicator = get_deduplicator()
+        if use_quality_module is None:
+            use_quality_module = config.use_quality_module
+        
+        self._process = _make_processor(
+            deduplicator.is_duplicate if dedup_enabled else None,
+            language_filter_enabled,
+            use_quality_module,
+        )
+        
+        _init_filter_worker(language_filter_enabled)
+    
+    def process(self, text: str) -> Optional[str]:
+        """
+        Process a single text through the entire pipeline
+        
+        Args:
+            text: Input text
+        
+        Returns:
+            Processed text if it passes all filters, None otherwise
+        """
+        return self._process(text)
+
+
+# Lines per chunk when filtering in this process
+PARALLEL_CHUNK_SIZE = 4096
+
+# Bytes of input per task sent to worker processes
+PARALLEL_RANGE_SIZE = 8 * 1024 * 1024
+
+# Line chunks read ahead of the filters when running in this process
+PREFETCH_CHUNKS = 2
+
+# Source file shards per worker process in process_and_mix_files_parallel
+SHARDS_PER_PROCESS = 4
+
+
+def _filter_chunk(args):
+    """
+    Worker for parallel processing: runs all stateless filters on a chunk of lines.
+    Dedup needs global state, so it is left to the parent process.
+    Language detection runs as one batched fasttext call for the whole chunk.
+    Args tuple: (lines, language_filter_enabled, use_quality_module)
+    
+    Records carrying a "source" key skip language detection when
+    LANGUAGE_FILTER_BY_SOURCE marks that source as trusted.
+    
+    Returns:
+        List of (cleaned_text_or_None, passes_after_dedup) per input record
+    """
+    lines, language_filter_enabled, use_quality_module = args
+    
+    # Steps 1-2 per record: [cleaned_or_None, needs_language_check]
+    records = []
+    for line in lines:
+        try:
+            data = orjson.loads(line)
+            text = data.get("text", "")
+        except orjson.JSONDecodeError:
+            continue
+        except Exception as e:
+            print(f"Error processing line: {e}")
+            continue
+        
+        if not text:
+            continue
+        
         try:
-            risk_score = compute_risk_score(cleaned)
-            if risk_score >= config.quality_risk_threshold:
-                return None  # Drop high-risk content
+            lang_enabled = language_filter_enabled and LANGUAGE_FILTER_BY_SOURCE.get(data.get("source"), True)
+            records.append([_filter_before_language(text), lang_enabled])
         except Exception as e:
-            # If risk scoring fails, log but don't fail the text
-            print(f"Risk scoring error: {e}")
-            # Continue with text (fail-safe)
+            print(f"Error processing line: {e}")
+            records.append([None, False])
     
-    return cleaned
+    # Step 3 for all survivors at once
+    lang_indices = [i for i, (cleaned, lang_enabled) in enumerate(records) if cleaned is not None and lang_enabled]
+    if lang_indices:
+        accepted = language_filter_batch([records[i][0] for i in lang_indices])
+        for i, ok in zip(lang_indices, accepted):
+            if not ok:
+                records[i][0] = None
+    
+    # Steps 5-6 per survivor (dedup, step 4, happens in the parent)
+    results = []
+    for cleaned, _ in records:
+        if cleaned is None:
+            results.append((None, False))
+            continue
+        try:
+            results.append((cleaned, _filter_after_dedup(cleaned, use_quality_module)))
+        except Exception as e:
+            print(f"Error processing line: {e}")
+            results.append((None, False))
+    
+    return results
+
+
+def _filter_range(args):
+    """
+    Worker for parallel processing: reads its own byte range of the input file
+    (memory-mapped) and filters it like _filter_chunk, so the parent never has
+    to read or pickle the input lines.
+    Args tuple: (input_file, start, end, language_filter_enabled, use_quality_module)
+    """
+    input_file, start, end, language_filter_enabled, use_quality_module = args
+    lines = read_line_range(input_file, start, end)
+    return _filter_chunk((lines, language_filter_enabled, use_quality_module))
+
+
+def _init_filter_worker(language_filter_enabled: bool):
+    """
+    Pool initializer: load the language model once per worker process, so
+    the first chunk of every worker doesn't pay the model load (forked
+    workers already inherit the parent's copy and return immediately).
+    """
+    if language_filter_enabled:
+        try:
+            load_language_model()
+        except Exception:
+            # Surfaces (and is handled) per chunk in language_filter_batch
+            pass
+
+
+def _create_filter_pool(num_workers: int, language_filter_enabled: bool):
+    """
+    Create the worker pool for the stateless filters (None if num_workers <= 1)
+    
+    The model is loaded (and downloaded if missing) here first, so workers
+    never race to download it.
+    """
+    if num_workers <= 1:
+        return None
+    _init_filter_worker(language_filter_enabled)
+    return mp.Pool(
+        processes=num_workers,
+        initializer=_init_filter_worker,
+        initargs=(language_filter_enabled,),
+    )
+
+
+def _iter_processed_chunks(
+    input_file: str,
+    deduplicator,
+    language_filter_enabled: bool = True,
+    dedup_enabled: bool = True,
+    use_quality_module: Optional[bool] = None,
+    pool=None,
+    start: int = 0,
+    end: Optional[int] = None,
+    num_workers: int = 1,
+) -> Iterator[List[Optional[str]]]:
+    """
+    Run a JSONL file through the full pipeline chunk by chunk: stateless filters
+    in batches (in `pool` if given, with one fasttext call per chunk), then
+    dedup here in input order. Same per-text result as process_text.
+    
+    Args:
+        input_file: Input JSONL file path
+        deduplicator: Deduplicator to use
+        language_filter_enabled: Whether to apply language filter
+        dedup_enabled: Whether to apply deduplication
+        use_quality_module: Whether to use quality module risk scoring (None = use config default)
+        pool: Optional multiprocessing Pool for the stateless filters
+        start: Byte offset to start at (beginning of a line)
+        end: Byte offset to stop at (after a newline; None = EOF)
+        num_workers: Number of worker processes in `pool`
+        
+    Yields:
+        Per chunk, a list with the processed text (or None if rejected) of each
+        input record that has text, in input order
+    """
+    if pool is not None:
+        # Workers read newline-aligned byte ranges straight from the file
+        ranges = (
+            (input_file, range_start, range_end, language_filter_enabled, use_quality_module)
+            for range_start, range_end in iter_line_ranges(input_file, PARALLEL_RANGE_SIZE, start, end)
+        )
+        chunk_results = imap_bounded(pool, _filter_range, ranges, max_pending=num_workers * 2)
+    else:
+        # The next chunk is read and split on a background thread while
+        # this one is being filtered
+        lines_iter = iter_lines(input_file, start=start, end=end)
+        line_chunks = prefetch(
+            iter(lambda: list(islice(lines_iter, PARALLEL_CHUNK_SIZE)), []),
+            max_pending=PREFETCH_CHUNKS,
+        )
+        chunks = (
+            (lines, language_filter_enabled, use_quality_module)
+            for lines in line_chunks
+        )
+        chunk_results = map(_filter_chunk, chunks)
+    
+    for results in chunk_results:
+        # Dedup sees every text that passed the earlier filters, in input
+        # order, exactly as process_text does (one batch call per chunk)
+        survivors = [cleaned for cleaned, _ in results if cleaned is not None]
+        is_dup = iter(deduplicator.is_duplicate_batch(survivors) if dedup_enabled else [False] * len(survivors))
+        
+        processed_chunk = []
+        for cleaned, passes_after_dedup in results:
+            if cleaned is not None and not next(is_dup) and passes_after_dedup:
+                processed_chunk.append(cleaned)
+            else:
+                processed_chunk.append(None)
+        yield processed_chunk
+
+
+def _encode_chunk(processed_chunk: List[Optional[str]]) -> List[bytes]:
+    """
+    Encode the passing texts of a chunk as JSONL lines
+    (one comprehension per chunk instead of per-record counter/branch work)
+    
+    Args:
+        processed_chunk: Processed texts, None for rejected records
+        
+    Returns:
+        List of encoded lines, one per passing text
+    """
+    dumps = orjson.dumps
+    option = orjson.OPT_APPEND_NEWLINE
+    return [dumps({"text": text}, option=option) for text in processed_chunk if text is not None]
+
+
+def _progress_points(
+    processed_chunk: List[Optional[str]],
+    total: int,
+    passed: int,
+    progress_interval: int,
+) -> Iterator[Tuple[int, int]]:
+    """
+    Progress counts at every progress_interval-th record within a chunk
+    
+    Args:
+        processed_chunk: Processed texts, None for rejected records
+        total: Records processed before this chunk
+        passed: Records passed before this chunk
+        progress_interval: Report every N records
+        
+    Yields:
+        (total, passed) as they were right after each reported record
+    """
+    first = progress_interval - total % progress_interval
+    for n in range(first, len(processed_chunk) + 1, progress_interval):
+        yield total + n, passed + sum(text is not None for text in processed_chunk[:n])
 
 
 def process_jsonl_file(
@@ -102,7 +504,11 @@ def process_jsonl_file(
     language_filter_enabled: bool = True,
     dedup_enabled: bool = True,
     use_quality_module: Optional[bool] = None,
-):
+    num_workers: int = 1,
+    source: Optional[str] = None,
+    byte_range: Optional[Tuple[int, int]] = None,
+    verbose: bool = True,
+) -> Tuple[int, int]:
     """
     Process a JSONL file through the entire pipeline
     
@@ -111,7 +517,23 @@ def process_jsonl_file(
         output_file: Output JSONL file path
         reset_dedup: Whether to reset deduplicator before processing
         progress_interval: Print progress every N examples
+        num_workers: Number of worker processes for the stateless filters
+                     (1 = run in this process). Dedup always runs here,
+                     in input order, so output is identical for any value.
+        source: Source name of the whole file (e.g. "wiki_tr"); trusted sources in
+                LANGUAGE_FILTER_BY_SOURCE skip language detection. Per-record
+                "source" keys are honored the same way.
+        byte_range: Optional newline-aligned (start, end) byte range of input_file
+                    to process instead of the whole file
+        verbose: Whether to print the final stats block (per-shard workers
+                 report their counts to the parent instead)
+    
+    Returns:
+        Tuple of (records processed, records passed)
     """
+    if source is not None:
+        language_filter_enabled = language_filter_enabled and LANGUAGE_FILTER_BY_SOURCE.get(source, True)
+    
     if reset_dedup:
         reset_deduplicator()
     
@@ -122,71 +544,58 @@ def process_jsonl_file(
     
     total = 0
     passed = 0
+    pool = _create_filter_pool(num_workers, language_filter_enabled)
     
-    with open(input_file, "r", encoding="utf-8") as in_f, \
-         open(output_file, "w", encoding="utf-8") as out_f:
-        
-        for line in in_f:
-            line = line.strip()
-            if not line:
-                continue
-            
-            try:
-                data = json.loads(line)
-                text = data.get("text", "")
-                
-                if not text:
-                    continue
-                
-                total += 1
-                
-                # Process through pipeline
-                processed = process_text(
-                    text,
-                    deduplicator,
-                    language_filter_enabled=language_filter_enabled,
-                    dedup_enabled=dedup_enabled,
-                    use_quality_module=use_quality_module,
-                )
-                
-                if processed is not None:
-                    # Write to output
-                    output_data = {"text": processed}
-                    out_f.write(json.dumps(output_data, ensure_ascii=False) + "\n")
-                    passed += 1
+    try:
+        with open(output_file, "wb", buffering=WRITE_BUFFER_SIZE) as out_f:
+            chunks = _iter_processed_chunks(
+                input_file, deduplicator, language_filter_enabled, dedup_enabled, use_quality_module, pool,
+                *(byte_range or ()), num_workers=num_workers,
+            )
+            for processed_chunk in chunks:
+                # Encode the chunk's output and write it in one call
+                encoded = _encode_chunk(processed_chunk)
                 
                 # Progress reporting
-                if total % progress_interval == 0:
-                    print(f"Processed: {total:,} | Passed: {passed:,} | Rate: {passed/total*100:.1f}%")
-                    
-            except json.JSONDecodeError:
-                continue
-            except Exception as e:
-                print(f"Error processing line: {e}")
-                continue
+                for total_at, passed_at in _progress_points(processed_chunk, total, passed, progress_interval):
+                    print(f"Processed: {total_at:,} | Passed: {passed_at:,} | Rate: {passed_at/total_at*100:.1f}%")
+                
+                total += len(processed_chunk)
+                passed += len(encoded)
+                out_f.write(b"".join(encoded))
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
     
-    print(f"\nFinal Stats:")
-    print(f"  Total processed: {total:,}")
-    print(f"  Passed filters: {passed:,}")
-    print(f"  Filter rate: {passed/total*100:.1f}%")
-    print(f"  Output saved to: {output_file}")
+    if verbose:
+        print(f"\nFinal Stats:")
+        print(f"  Total processed: {total:,}")
+        print(f"  Passed filters: {passed:,}")
+        print(f"  Filter rate: {passed/total*100 if total else 0.0:.1f}%")
+        print(f"  Output saved to: {output_file}")
+    
+    return total, passed
 
 
 # ============================================================================
 # DATASET MIXING FUNCTIONS (Ratio-aware mixing after cleaning/dedup)
 # ============================================================================
 
+# Per-source example counts derived from DATASET_MIX, computed once at import
+TARGET_COUNTS = {k: int(v["target"] * TOTAL_TARGET_EXAMPLES) for k, v in DATASET_MIX.items()}
+FETCH_COUNTS = {k: int(count * OVERFETCH_FACTOR) for k, count in TARGET_COUNTS.items()}
+MAX_COUNTS = {k: int(v["max"] * TOTAL_TARGET_EXAMPLES) for k, v in DATASET_MIX.items()}
+
+
 def compute_target_counts():
     """
     Calculate target counts for each dataset based on ratios
     
     Returns:
-        Dict mapping source names to target example counts
+        Dict mapping source names to target example counts (a copy of TARGET_COUNTS)
     """
-    return {
-        k: int(v["target"] * TOTAL_TARGET_EXAMPLES)
-        for k, v in DATASET_MIX.items()
-    }
+    return dict(TARGET_COUNTS)
 
 
 def compute_fetch_counts():
@@ -194,19 +603,95 @@ def compute_fetch_counts():
     Calculate how much to fetch initially (overfetch to compensate for dedup/filter losses)
     
     Returns:
-        Dict mapping source names to fetch counts (with overfetch factor)
+        Dict mapping source names to fetch counts (a copy of FETCH_COUNTS)
     """
-    targets = compute_target_counts()
-    return {
-        k: int(count * OVERFETCH_FACTOR)
-        for k, count in targets.items()
-    }
+    return dict(FETCH_COUNTS)
+
+
+def compute_mix_counts(available: Dict[str, int], targets: Dict[str, int]) -> Dict[str, int]:
+    """
+    Calculate how many examples to take from each source: its target, capped at
+    what is available. The shortfall of short sources is redistributed to
+    sources with spare examples, in proportion to their headroom up to their
+    DATASET_MIX "max" ratio, so the mix stays close to TOTAL_TARGET_EXAMPLES
+    without any source leaving its allowed range.
+    
+    Args:
+        available: Dict of {source_name: available example count}
+        targets: Dict of {source_name: target_count}
+        
+    Returns:
+        Dict of {source_name: number of examples to take}
+    """
+    counts = {source: min(n, targets[source]) for source, n in available.items()}
+    deficit = sum(targets[source] - count for source, count in counts.items())
+    
+    headroom = {}
+    for source, count in counts.items():
+        if source in MAX_COUNTS:
+            spare = min(available[source], MAX_COUNTS[source]) - count
+            if spare > 0:
+                headroom[source] = spare
+    total_headroom = sum(headroom.values())
+    
+    if deficit > 0 and total_headroom > 0:
+        for source, spare in headroom.items():
+            counts[source] += spare if deficit >= total_headroom else deficit * spare // total_headroom
+    return counts
+
+
+def _reservoir_sample(items: Iterator, k: int) -> Tuple[List, int]:
+    """
+    Uniform random sample of k items from a stream (Algorithm R), holding
+    only the sample in memory
+    
+    Args:
+        items: Input stream
+        k: Sample size
+        
+    Returns:
+        Tuple of (sample, number of items seen); the sample holds all items if there are <= k
+    """
+    items = iter(items)
+    reservoir = list(islice(items, k)) if k > 0 else []
+    n = len(reservoir)
+    randrange = random.randrange
+    for n, item in enumerate(items, n + 1):
+        j = randrange(n)
+        if j < k:
+            reservoir[j] = item
+    return reservoir, n
+
+
+def _partial_shuffle(items: List, k: int) -> List:
+    """
+    Move a uniform random sample of k items, in random order, to the front
+    of items (Fisher-Yates stopped after k steps: O(k) swaps instead of
+    shuffling the whole list)
+    
+    Args:
+        items: List to shuffle in place
+        k: Number of leading positions to fill
+        
+    Returns:
+        items[:k]
+    """
+    n = len(items)
+    k = min(k, n)
+    randrange = random.randrange
+    for i in range(k):
+        j = randrange(i, n)
+        items[i], items[j] = items[j], items[i]
+    return items[:k]
 
 
 def mix_datasets_from_files(deduped_files: dict, output_file: str, targets: dict):
     """
     Mix datasets from files (streaming, RAM efficient)
     
+    Sources with no more lines than their target are copied to the output
+    whole (file order, via os.sendfile); larger ones are randomly sampled.
+    
     Args:
         deduped_files: Dict of {source_name: file_path}
         output_file: Output file path
@@ -222,36 +707,43 @@ def mix_datasets_from_files(deduped_files: dict, output_file: str, targets: dict
     stats = {}
     total_written = 0
     
-    # Her source için metinleri oku ve hedef sayıya kadar seç (sadece gerekli olanları RAM'e al)
+    # Source sizes first, so short sources' shortfall can be taken from others
+    line_counts = {source: count_lines(file_path) for source, file_path in deduped_files.items()}
+    mix_counts = compute_mix_counts(line_counts, targets)
+    
+    # Her source için hedef sayıya kadar rastgele satır seç (sadece seçilenler RAM'de)
+    # None: the whole file is taken and copied as-is (no sampling needed)
     source_texts = {}
     for source, file_path in deduped_files.items():
-        texts = []
         print(f"  Loading {source} for mixing...")
-        with open(file_path, "r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if line:
-                    texts.append(line)
-        
-        target_count = targets.get(source, 0)
-        random.shuffle(texts)
-        keep_n = min(len(texts), target_count)
-        source_texts[source] = texts[:keep_n]
+        target_count = targets[source]
+        line_count = line_counts[source]
+        if line_count <= mix_counts[source]:
+            texts, available, keep_n = None, line_count, line_count
+        else:
+            # Raw JSONL lines (bytes): copied to the output as-is, never parsed
+            texts, available = _reservoir_sample(iter_lines(file_path), mix_counts[source])
+            random.shuffle(texts)
+            keep_n = len(texts)
+        source_texts[source] = texts
         
         stats[source] = {
-            "available": len(texts),
+            "available": available,
             "target": target_count,
             "selected": keep_n,
-            "ratio": keep_n / len(texts) if len(texts) > 0 else 0
+            "ratio": keep_n / available if available > 0 else 0
         }
         print(f"  {source:12s}: {keep_n:>8,}/{target_count:>8,} target ({keep_n/target_count*100:.1f}% of target)")
     
     # Final output'a yaz
-    with open(output_file, "w", encoding="utf-8") as out_f:
+    with open(output_file, "wb", buffering=WRITE_BUFFER_SIZE) as out_f:
         for source, texts in source_texts.items():
-            for text_line in texts:
-                out_f.write(text_line + "\n")
-                total_written += 1
+            if texts is None:
+                append_file(out_f, deduped_files[source])
+                total_written += stats[source]["selected"]
+            else:
+                write_lines(out_f, texts)
+                total_written += len(texts)
     
     # Print final ratio report
     print(f"\nFinal Mix Ratios:")
@@ -275,7 +767,7 @@ def mix_datasets(cleaned_datasets: dict, output_file: str):
     Returns:
         Dict with statistics about the mixing process
     """
-    targets = compute_target_counts()
+    targets = TARGET_COUNTS
     
     print(f"\n{'='*60}")
     print(f"Mixing datasets to target ratios...")
@@ -285,21 +777,21 @@ def mix_datasets(cleaned_datasets: dict, output_file: str):
     stats = {}
     total_written = 0
     
-    with open(output_file, "w", encoding="utf-8") as out_f:
+    # Short sources' shortfall is taken from sources with spare examples
+    mix_counts = compute_mix_counts({source: len(texts) for source, texts in cleaned_datasets.items()}, targets)
+    
+    with open(output_file, "wb", buffering=WRITE_BUFFER_SIZE) as out_f:
         for source, texts in cleaned_datasets.items():
-            target_count = targets.get(source, 0)
-            
-            # Shuffle for randomness
-            random.shuffle(texts)
+            target_count = targets[source]
             
-            # Take up to target count
-            keep_n = min(len(texts), target_count)
-            selected_texts = texts[:keep_n]
+            # Take a random sample of up to the source's mix count (target, or more
+            # to cover others' shortfall); only the sampled positions are shuffled
+            keep_n = mix_counts[source]
+            selected_texts = _partial_shuffle(texts, keep_n)
             
             # Write to output
-            for text in selected_texts:
-                out_f.write(json.dumps({"text": text}, ensure_ascii=False) + "\n")
-                total_written += 1
+            write_lines(out_f, (orjson.dumps({"text": text}) for text in selected_texts))
+            total_written += len(selected_texts)
             
             stats[source] = {
                 "available": len(texts),
@@ -325,7 +817,8 @@ def process_and_mix_files(
     input_files_with_sources: List[Tuple[str, str]],
     output_file: str,
     reset_dedup_between: bool = False,
-    progress_interval: int = 10000
+    progress_interval: int = 10000,
+    num_workers: int = 1,
 ):
     """
     Process files through pipeline and mix according to target ratios
@@ -335,6 +828,8 @@ def process_and_mix_files(
         output_file: Output file path
         reset_dedup_between: Whether to reset dedup between files
         progress_interval: Print progress every N examples
+        num_workers: Number of worker processes for the stateless filters
+                     (1 = run in this process; output is identical for any value)
         
     Returns:
         Dict with statistics about the mixing process
@@ -347,85 +842,222 @@ def process_and_mix_files(
     if not reset_dedup_between:
         reset_deduplicator()
     
-    # Store cleaned texts by source
-    cleaned_by_source = {source: [] for source, _ in input_files_with_sources}
+    # Cleaned texts are streamed to one temp file per source (not kept in RAM);
+    # the mix step then samples each file down to its target
+    base_tmp_dir = Path("tmp")
+    base_tmp_dir.mkdir(exist_ok=True)
+    cleaned_by_source = {
+        source: str(base_tmp_dir / f"cleaned_{source}.jsonl") for source, _ in input_files_with_sources
+    }
+    cleaned_outs = {
+        source: open(path, "wb", buffering=WRITE_BUFFER_SIZE) for source, path in cleaned_by_source.items()
+    }
     
-    for source, input_file in input_files_with_sources:
-        print(f"\nProcessing: {source} ({input_file})")
-        
-        if reset_dedup_between:
-            reset_deduplicator()
-        
-        deduplicator = get_deduplicator()
-        lang_enabled = LANGUAGE_FILTER_BY_SOURCE.get(source, True)
-        total = 0
-        passed = 0
-        
-        with open(input_file, "r", encoding="utf-8") as in_f:
-            for line in in_f:
-                line = line.strip()
-                if not line:
-                    continue
+    pool = _create_filter_pool(
+        num_workers,
+        any(LANGUAGE_FILTER_BY_SOURCE.get(source, True) for source, _ in input_files_with_sources),
+    )
+    try:
+        for source, input_file in input_files_with_sources:
+            print(f"\nProcessing: {source} ({input_file})")
+            
+            if reset_dedup_between:
+                reset_deduplicator()
+            
+            deduplicator = get_deduplicator()
+            lang_enabled = LANGUAGE_FILTER_BY_SOURCE.get(source, True)
+            total = 0
+            passed = 0
+            
+            chunks = _iter_processed_chunks(
+                input_file,
+                deduplicator,
+                language_filter_enabled=lang_enabled,
+                dedup_enabled=True,
+                use_quality_module=config.use_quality_module,
+                pool=pool,
+                num_workers=num_workers,
+            )
+            for processed_chunk in chunks:
+                encoded = _encode_chunk(processed_chunk)
                 
-                try:
-                    data = json.loads(line)
-                    text = data.get("text", "")
-                    
-                    if not text:
-                        continue
-                    
-                    total += 1
-                    
-                    # Process through pipeline
-                    processed = process_text(
-                        text,
-                        deduplicator,
-                        language_filter_enabled=lang_enabled,
-                        dedup_enabled=True,
-                        use_quality_module=config.use_quality_module,
-                    )
-                    
-                    if processed is not None:
-                        cleaned_by_source[source].append(processed)
-                        passed += 1
-                    
-                    # Progress reporting
-                    if total % progress_interval == 0:
-                        print(f"  Progress: {total:,} processed | {passed:,} passed | Rate: {passed/total*100:.1f}%")
+                # Progress reporting
+                for total_at, passed_at in _progress_points(processed_chunk, total, passed, progress_interval):
+                    print(f"  Progress: {total_at:,} processed | {passed_at:,} passed | Rate: {passed_at/total_at*100:.1f}%")
                 
-                except (json.JSONDecodeError, Exception) as e:
-                    continue
-        
-        print(f"  {source}: {passed:,}/{total:,} passed ({passed/total*100:.1f}%)")
+                total += len(processed_chunk)
+                passed += len(encoded)
+                cleaned_outs[source].write(b"".join(encoded))
+            
+            print(f"  {source}: {passed:,}/{total:,} passed ({passed/total*100 if total else 0.0:.1f}%)")
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+        for f in cleaned_outs.values():
+            f.close()
     
     # Step 2: Mix according to target ratios
     print(f"\n{'='*60}")
     print(f"Step 2: Mixing datasets to target ratios...")
     print(f"{'='*60}")
     
-    stats = mix_datasets(cleaned_by_source, output_file)
+    stats = mix_datasets_from_files(cleaned_by_source, output_file, TARGET_COUNTS)
     
     return stats
 
 
-def _clean_file_no_dedup(args):
+def _clean_file_source_dedup(args):
     """
-    Worker for parallel cleaning without dedup.
-    Args tuple: (source, input_file, temp_output, progress_interval, use_quality_module)
+    Worker for parallel cleaning with inline per-source dedup.
+    Cleans one newline-aligned byte range (shard) of a source file.
+    Duplicates within the shard are dropped while streaming, so the global
+    pass only has cross-shard duplicates left to remove (and reads less data).
+    With num_dedup_shards > 1 the output is also split into that many files
+    by get_shard_id here, so the parent never partitions the data serially.
+    Args tuple: (source_idx, shard_idx, source, input_file, start, end, temp_output,
+                 progress_interval, use_quality_module, num_dedup_shards)
+    
+    Returns:
+        (source_idx, shard_idx, output files, (processed, passed)): output files are
+        [temp_output], or one file per dedup shard
     """
-    source, input_file, temp_output, progress_interval, use_quality_module = args
-    lang_enabled = LANGUAGE_FILTER_BY_SOURCE.get(source, True)
-    # Clean with language filter, PII, quality; skip dedup for global dedup later
-    process_jsonl_file(
+    (source_idx, shard_idx, source, input_file, start, end, temp_output,
+     progress_interval, use_quality_module, num_dedup_shards) = args
+    # Clean with language filter, PII, quality and this worker's own deduplicator
+    counts = process_jsonl_file(
         input_file=input_file,
         output_file=temp_output,
         reset_dedup=True,
         progress_interval=progress_interval,
-        language_filter_enabled=lang_enabled,
-        dedup_enabled=False,
+        dedup_enabled=True,
         use_quality_module=use_quality_module,
+        source=source,
+        byte_range=(start, end),
+        verbose=False,
     )
-    return source, temp_output
+    if num_dedup_shards <= 1:
+        return source_idx, shard_idx, [temp_output], counts
+    
+    base = Path(temp_output)
+    outputs = [str(base.with_name(f"{base.stem}_dedup{i}.jsonl")) for i in range(num_dedup_shards)]
+    _partition_for_dedup(temp_output, outputs)
+    os.remove(temp_output)
+    return source_idx, shard_idx, outputs, counts
+
+
+def _partition_for_dedup(input_file: str, output_files: List[str]):
+    """
+    Split a cleaned JSONL file by get_shard_id (exact duplicates always land
+    in the same output file), keeping line order within each output
+    
+    Args:
+        input_file: Cleaned JSONL file
+        output_files: One output path per dedup shard
+    """
+    # Many files are open at once: split the usual write buffer between them
+    buffering = max(io.DEFAULT_BUFFER_SIZE, WRITE_BUFFER_SIZE // len(output_files))
+    outs = [open(path, "wb", buffering=buffering) for path in output_files]
+    try:
+        for line in iter_lines(input_file):
+            try:
+                text = orjson.loads(line).get("text", "")
+            except Exception:
+                continue
+            if not text:
+                continue
+            outs[get_shard_id(text, len(outs))].write(line + b"\n")
+    finally:
+        for f in outs:
+            f.close()
+
+
+def _dedup_shard_files(args):
+    """
+    Worker for sharded global dedup: exact/fuzzy dedup of one dedup shard
+    with a fresh deduplicator. The shard's files are read in source order
+    (and input order within a source), so the copy kept of each text is the
+    one a single global pass would keep.
+    Args tuple: (files_by_source, kept_files) - per source, the shard's
+    cleaned files and the output path for its kept lines
+    
+    Returns:
+        (totals, kept): per-source line counts before and after dedup
+    """
+    files_by_source, kept_files = args
+    reset_deduplicator()
+    deduplicator = get_deduplicator()
+    totals = []
+    kept = []
+    for files, kept_file in zip(files_by_source, kept_files):
+        total = 0
+        n_kept = 0
+        with open(kept_file, "wb", buffering=WRITE_BUFFER_SIZE) as f_out:
+            for path in files:
+                lines_iter = iter_lines(path)
+                for lines in iter(lambda: list(islice(lines_iter, PARALLEL_CHUNK_SIZE)), []):
+                    is_dup = deduplicator.is_duplicate_batch([orjson.loads(line)["text"] for line in lines])
+                    survivors = [line for line, dup in zip(lines, is_dup) if not dup]
+                    write_lines(f_out, survivors)
+                    total += len(lines)
+                    n_kept += len(survivors)
+                os.remove(path)
+        totals.append(total)
+        kept.append(n_kept)
+    return totals, kept
+
+
+def _global_dedup_sharded(
+    sources: List[str],
+    shard_outputs: List[List[List[str]]],
+    tmp_dir: Path,
+    num_shards: int,
+    processes: int,
+) -> Dict[str, str]:
+    """
+    Global dedup split into hash-prefix shards that are deduped independently
+    in parallel, so each worker only holds one shard's dedup index in RAM.
+    The cleaning workers already wrote every range's output split by shard.
+    Exact duplicates always share a shard (result is identical to a single pass);
+    fuzzy near-duplicates are only caught within a shard.
+    
+    Args:
+        sources: Source names, in priority order
+        shard_outputs: Per source, per cleaned range (in input order), the
+                       range's output file for each dedup shard
+        tmp_dir: Directory for kept files
+        num_shards: Number of shards
+        processes: Max number of parallel dedup processes
+        
+    Returns:
+        Dict of {source_name: deduped_file_path}
+    """
+    kept_files = [
+        [str(tmp_dir / f"dedup{i}_kept_{source}.jsonl") for source in sources]
+        for i in range(num_shards)
+    ]
+    tasks = [
+        ([[outputs[i] for outputs in ranges] for ranges in shard_outputs], kept_files[i])
+        for i in range(num_shards)
+    ]
+    
+    print(f"  Deduplicating {num_shards} shards in parallel...")
+    with mp.Pool(processes=max(1, min(processes, num_shards))) as pool:
+        shard_counts = pool.map(_dedup_shard_files, tasks)
+    
+    # Concatenate: shard çıktıları source bazlı dosyalara eklenir (kernel'de kopyalanır)
+    deduped_by_source = {}
+    for src_idx, source in enumerate(sources):
+        deduped_file = str(tmp_dir / f"deduped_{source}.jsonl")
+        deduped_by_source[source] = deduped_file
+        with open(deduped_file, "wb") as f_out:
+            for shard_kept in kept_files:
+                append_file(f_out, shard_kept[src_idx])
+                os.remove(shard_kept[src_idx])
+        total = sum(totals[src_idx] for totals, _ in shard_counts)
+        kept = sum(kept[src_idx] for _, kept in shard_counts)
+        print(f"  {source}: {kept:,}/{total:,} kept after global dedup")
+    return deduped_by_source
 
 
 def process_and_mix_files_parallel(
@@ -436,8 +1068,15 @@ def process_and_mix_files_parallel(
     use_quality_module: Optional[bool] = None,
 ):
     """
-    Parallel cleaning (per source) without dedup, then global dedup + mix.
-    Keeps quality: language filter ON for all sources; dedup is applied globally after cleaning.
+    Parallel cleaning (per source shard, with inline dedup), then global dedup + mix.
+    Keeps quality: language filter ON for all sources; cross-source duplicates are removed
+    by the global dedup pass after cleaning.
+    
+    With config.global_dedup_shared_bloom, all workers do exact dedup against one
+    Bloom filter in shared memory while cleaning, so the cleaned files are already
+    globally deduped and the second pass is skipped. Which source keeps a
+    cross-source duplicate then depends on timing rather than source order, and
+    fuzzy/shingle dedup (if enabled) stays per source.
     
     Args:
         input_files_with_sources: List of (source, input_file) tuples
@@ -447,66 +1086,132 @@ def process_and_mix_files_parallel(
         use_quality_module: Whether to use quality module risk scoring (None = use config default)
     """
     print(f"\n{'='*60}")
-    print("Parallel cleaning per source (dedup deferred)...")
+    print("Parallel cleaning per source (cross-source dedup deferred)...")
     print(f"{'='*60}")
 
     # Prepare temp outputs
     base_tmp_dir = Path("tmp")
     base_tmp_dir.mkdir(exist_ok=True)
+    procs = processes or mp.cpu_count()
+
+    # Split every source file into newline-aligned shards (~SHARDS_PER_PROCESS
+    # per process overall), so one large source doesn't leave the other workers idle
+    shared_bloom = config.global_dedup_shared_bloom and config.exact_dedup_enabled
+    # Sharded global dedup: cleaning workers split their output by dedup shard
+    num_dedup_shards = config.dedup_shards if not shared_bloom else 1
+
+    total_bytes = sum(os.path.getsize(input_file) for _, input_file in input_files_with_sources)
+    shard_size = max(PARALLEL_RANGE_SIZE, total_bytes // (procs * SHARDS_PER_PROCESS))
     tasks = []
-    for source, input_file in input_files_with_sources:
-        temp_output = base_tmp_dir / f"cleaned_{source}.jsonl"
-        tasks.append((source, input_file, str(temp_output), progress_interval, use_quality_module))
+    shard_outputs = []
+    for source_idx, (source, input_file) in enumerate(input_files_with_sources):
+        ranges = list(iter_line_ranges(input_file, shard_size))
+        shard_outputs.append([None] * len(ranges))
+        for shard_idx, (start, end) in enumerate(ranges):
+            temp_output = base_tmp_dir / f"cleaned_{source}_{shard_idx}.jsonl"
+            tasks.append((
+                source_idx, shard_idx, source, input_file, start, end, str(temp_output),
+                progress_interval, use_quality_module, num_dedup_shards,
+            ))
+
+    # Load (or download) the language model once here: forked workers inherit it
+    _init_filter_worker(True)
+
+    # Run cleaning in parallel; shards are picked up as workers free up
+    shm = None
+    pool_kwargs = {}
+    if shared_bloom:
+        capacity = config.global_dedup_bloom_capacity
+        error_rate = config.global_dedup_bloom_error_rate
+        shm = create_shared_exact_bloom(capacity, error_rate)
+        pool_kwargs = {
+            "initializer": attach_shared_exact_bloom,
+            "initargs": (shm.name, capacity, error_rate),
+        }
+    # [processed, passed] per source, summed over its shards
+    source_counts = [[0, 0] for _ in input_files_with_sources]
+    try:
+        with mp.Pool(processes=max(1, min(procs, len(tasks))), **pool_kwargs) as pool:
+            for source_idx, shard_idx, outputs, (total, passed) in pool.imap_unordered(
+                _clean_file_source_dedup, tasks
+            ):
+                shard_outputs[source_idx][shard_idx] = outputs
+                source_counts[source_idx][0] += total
+                source_counts[source_idx][1] += passed
+    finally:
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+    
+    for (source, _), (total, passed) in zip(input_files_with_sources, source_counts):
+        print(f"  {source}: {passed:,}/{total:,} passed ({passed/total*100 if total else 0.0:.1f}%)")
 
-    # Run per-source cleaning in parallel
-    procs = processes or min(len(tasks), mp.cpu_count())
-    with mp.Pool(processes=procs) as pool:
-        results = pool.map(_clean_file_no_dedup, tasks)
+    # Join each source's shard outputs, in input order (sharded dedup reads them as they are)
+    results = []
+    if num_dedup_shards <= 1:
+        for (source, _), shard_files in zip(input_files_with_sources, shard_outputs):
+            shard_files = [outputs[0] for outputs in shard_files]
+            cleaned_file = str(base_tmp_dir / f"cleaned_{source}.jsonl")
+            if len(shard_files) == 1:
+                os.replace(shard_files[0], cleaned_file)
+            else:
+                with open(cleaned_file, "wb") as f_out:
+                    for shard_file in shard_files:
+                        append_file(f_out, shard_file)
+                        os.remove(shard_file)
+            results.append((source, cleaned_file))
 
     # Global dedup + mix (streaming to avoid RAM issues)
     print(f"\n{'='*60}")
     print("Global deduplication and mixing...")
     print(f"{'='*60}")
 
-    reset_deduplicator()
-    deduplicator = get_deduplicator()
+    targets = TARGET_COUNTS
     
-    # Her source için dedup sonrası temp dosya (streaming)
-    deduped_by_source = {}
-    targets = compute_target_counts()
-    
-    # İlk pass: Global dedup ve temp dosyalara yazma (RAM efficient)
-    for source, temp_output in results:
-        total = 0
-        kept = 0
-        deduped_file = base_tmp_dir / f"deduped_{source}.jsonl"
-        deduped_by_source[source] = str(deduped_file)
+    if shared_bloom:
+        # Already deduped across sources by the workers
+        deduped_by_source = dict(results)
+    elif num_dedup_shards > 1:
+        sources = [source for source, _ in input_files_with_sources]
+        deduped_by_source = _global_dedup_sharded(sources, shard_outputs, base_tmp_dir, num_dedup_shards, procs)
+    else:
+        reset_deduplicator()
+        deduplicator = get_deduplicator()
         
-        print(f"  Processing {source} for global dedup...")
-        with open(temp_output, "r", encoding="utf-8") as f_in, \
-             open(deduped_file, "w", encoding="utf-8") as f_out:
-            for line in f_in:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    data = json.loads(line)
-                    text = data.get("text", "")
-                    if not text:
-                        continue
-                    total += 1
-                    if deduplicator.is_duplicate(text):
-                        continue
-                    # Direkt dosyaya yaz (RAM'de tutma!)
-                    f_out.write(line + "\n")
-                    kept += 1
-                    
-                    if total % 100000 == 0:
-                        print(f"    {source}: {total:,} processed | {kept:,} kept | Rate: {kept/total*100:.1f}%")
+        # Her source için dedup sonrası temp dosya (streaming)
+        deduped_by_source = {}
+        
+        # İlk pass: Global dedup ve temp dosyalara yazma (RAM efficient)
+        for i, (source, temp_output) in enumerate(results):
+            # The kernel reads the next source's file in while this one is deduped
+            if i + 1 < len(results):
+                prefetch_file(results[i + 1][1])
+            total = 0
+            kept = 0
+            deduped_file = base_tmp_dir / f"deduped_{source}.jsonl"
+            deduped_by_source[source] = str(deduped_file)
+            
+            print(f"  Processing {source} for global dedup...")
+            with open(deduped_file, "wb", buffering=WRITE_BUFFER_SIZE) as f_out:
+                for line in iter_lines(temp_output):
+                    try:
+                        data = orjson.loads(line)
+                        text = data.get("text", "")
+                        if not text:
+                            continue
+                        total += 1
+                        if deduplicator.is_duplicate(text):
+                            continue
+                        # Direkt dosyaya yaz (RAM'de tutma!)
+                        f_out.write(line + b"\n")
+                        kept += 1
                         
-                except Exception:
-                    continue
-        print(f"  {source}: {kept:,}/{total:,} kept after global dedup")
+                        if total % 100000 == 0:
+                            print(f"    {source}: {total:,} processed | {kept:,} kept | Rate: {kept/total*100 if total else 0.0:.1f}%")
+                            
+                    except Exception:
+                        continue
+            print(f"  {source}: {kept:,}/{total:,} kept after global dedup")
 
     # İkinci pass: Mixing için dosyalardan oku (sadece gerekli olanları RAM'e al)
     stats = mix_datasets_from_files(deduped_by_source, output_file, targets)
@@ -516,7 +1221,8 @@ def process_and_mix_files_parallel(
 def process_multiple_files(
     input_files: list,
     output_file: str,
-    reset_dedup_between: bool = False
+    reset_dedup_between: bool = False,
+    num_workers: int = 1,
 ):
     """
     Process multiple input files and combine into single output
@@ -525,6 +1231,8 @@ def process_multiple_files(
         input_files: List of input JSONL file paths
         output_file: Output JSONL file path
         reset_dedup_between: Whether to reset dedup between files (False = dedup across all files)
+        num_workers: Number of worker processes for the stateless filters, shared
+                     by all files (1 = run in this process; output is identical for any value)
     """
     print(f"Processing {len(input_files)} files...")
     
@@ -537,60 +1245,46 @@ def process_multiple_files(
     total_all = 0
     passed_all = 0
     
-    with open(output_file, "w", encoding="utf-8") as out_f:
-        for i, input_file in enumerate(input_files):
-            print(f"\nProcessing file {i+1}/{len(input_files)}: {input_file}")
-            
-            if reset_dedup_between:
-                reset_deduplicator()
-            
-            deduplicator = get_deduplicator()
-            
-            total = 0
-            passed = 0
-            
-            with open(input_file, "r", encoding="utf-8") as in_f:
-                for line in in_f:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    
-                    try:
-                        data = json.loads(line)
-                        text = data.get("text", "")
-                        
-                        if not text:
-                            continue
-                        
-                        total += 1
-                        total_all += 1
-                        
-                        # Process through pipeline
-                        processed = process_text(
-                            text, 
-                            deduplicator,
-                            use_quality_module=config.use_quality_module,
-                        )
-                        
-                        if processed is not None:
-                            # Write to output
-                            output_data = {"text": processed}
-                            out_f.write(json.dumps(output_data, ensure_ascii=False) + "\n")
-                            passed += 1
-                            passed_all += 1
-                            
-                    except json.JSONDecodeError:
-                        continue
-                    except Exception as e:
-                        print(f"Error processing line: {e}")
-                        continue
-            
-            print(f"  File stats: {passed:,}/{total:,} passed ({passed/total*100:.1f}%)")
+    pool = _create_filter_pool(num_workers, True)
+    try:
+        with open(output_file, "wb", buffering=WRITE_BUFFER_SIZE) as out_f:
+            for i, input_file in enumerate(input_files):
+                print(f"\nProcessing file {i+1}/{len(input_files)}: {input_file}")
+                
+                if reset_dedup_between:
+                    reset_deduplicator()
+                
+                deduplicator = get_deduplicator()
+                
+                total = 0
+                passed = 0
+                
+                chunks = _iter_processed_chunks(
+                    input_file,
+                    deduplicator,
+                    use_quality_module=config.use_quality_module,
+                    pool=pool,
+                    num_workers=num_workers,
+                )
+                for processed_chunk in chunks:
+                    encoded = _encode_chunk(processed_chunk)
+                    total += len(processed_chunk)
+                    passed += len(encoded)
+                    out_f.write(b"".join(encoded))
+                
+                total_all += total
+                passed_all += passed
+                
+                print(f"  File stats: {passed:,}/{total:,} passed ({passed/total*100 if total else 0.0:.1f}%)")
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
     
     print(f"\nOverall Stats:")
     print(f"  Total processed: {total_all:,}")
     print(f"  Passed filters: {passed_all:,}")
-    print(f"  Filter rate: {passed_all/total_all*100:.1f}%")
+    print(f"  Filter rate: {passed_all/total_all*100 if total_all else 0.0:.1f}%")
     print(f"  Output saved to: {output_file}")
 
 
@@ -616,14 +1310,13 @@ def run_full_pipeline(
     output_file = output_file or os.path.join(config.output_dir, config.train_output_file)
     
     # Calculate how much to fetch (with overfetch to compensate for dedup/filter losses)
-    fetch_counts = compute_fetch_counts()
+    fetch_counts = FETCH_COUNTS
     
     print(f"\n{'='*60}")
     print(f"Dataset Loading Plan (with {OVERFETCH_FACTOR}x overfetch):")
     print(f"{'='*60}")
     for source, count in fetch_counts.items():
-        target = int(DATASET_MIX[source]["target"] * TOTAL_TARGET_EXAMPLES)
-        print(f"  {source:12s}: {count:>10,} examples (target: {target:,})")
+        print(f"  {source:12s}: {count:>10,} examples (target: {TARGET_COUNTS[source]:,})")
     print()
     
     # Step 1: Load datasets with calculated limits
@@ -1,11 +1,9 @@
-import json
+import threading
+from typing import Optional
 
-JUDGE_PROMPT = """Sen çok KATI bir veri kalite denetçisisin.
-Aşağıdaki metin kurumsal chatbot pretrain datasına girecek.
-
-RISK SCORE: {risk_score:.2f} (0.4-0.7 arası = şüpheli içerik)
+import orjson
 
-KATI KURALLAR - ŞÜPHELİ İSE MUTLAKA DROP:
+JUDGE_RULES = """KATI KURALLAR - ŞÜPHELİ İSE MUTLAKA DROP:
 - PII (telefon, email, TC kimlik, adres) → DROP
 - Boilerplate / policy / footer / çerez uyarıları / disclaimer → DROP  
 - Spam / SEO / keyword stuffing / link farm / backlink → DROP
@@ -26,7 +24,14 @@ SADECE BU DURUMLARDA KEEP:
 - Eğitimsel / bilgilendirici değeri olan içerik
 - Forum yorumu değil, asıl içerik
 
-ÖNEMLİ: Risk score {risk_score:.2f} olduğu için bu içerik şüpheli. 
+"""
+
+JUDGE_PROMPT = """Sen çok KATI bir veri kalite denetçisisin.
+Aşağıdaki metin kurumsal chatbot pretrain datasına girecek.
+
+RISK SCORE: {risk_score:.2f} (0.4-0.7 arası = şüpheli içerik)
+
+""" + JUDGE_RULES + """ÖNEMLİ: Risk score {risk_score:.2f} olduğu için bu içerik şüpheli. 
 Çok seçici ol ve şüpheli ise MUTLAKA DROP ver.
 
 Sadece JSON döndür:
@@ -40,18 +45,41 @@ Metin:
 <<<{{text}}>>>
 """
 
+# Several texts per request: the rules and instructions are sent once per batch
+JUDGE_BATCH_PROMPT = """Sen çok KATI bir veri kalite denetçisisin.
+Aşağıdaki metinler kurumsal chatbot pretrain datasına girecek.
+Her metnin risk score'u yanında verilmiştir (0.4-0.7 arası = şüpheli içerik).
 
-def call_llm_api(text: str, risk_score: float = 0.0) -> dict:
+""" + JUDGE_RULES + """Her metni ayrı değerlendir. Çok seçici ol ve şüpheli ise MUTLAKA DROP ver.
+
+Sadece JSON döndür, her metin için bir sonuç (aynı "id" ile):
+{{
+  "results": [
+    {{
+      "id": 0,
+      "action": "KEEP" | "DROP",
+      "reason": "ok|pii|boilerplate|spam|toxic|low_info|forum|seo|ecommerce|astrology|repetitive|social_media|mixed_lang|news_list|product_spec",
+      "clean_text": ""
+    }}
+  ]
+}}
+
+Metinler (JSON):
+{items}
+"""
+
+
+# Model ve system mesajı (tekli ve toplu çağrılar için ortak)
+JUDGE_MODEL = "gpt-4o-mini"  # veya "gpt-4o" daha iyi sonuçlar için
+JUDGE_SYSTEM_MESSAGE = "Sen çok katı bir veri kalite denetçisisin. Şüpheli içerikleri DROP et. Sadece JSON döndür."
+
+
+def _create_client():
     """
-    LLM API çağrısı - OpenAI kullanıyor
+    OpenAI client oluştur
     API key'i OPENAI_API_KEY environment variable'ından alıyor
-    
-    Args:
-        text: Kontrol edilecek metin
-        risk_score: Risk skoru (0.0-1.0), LLM'e bilgi vermek için
     """
     import os
-    import json as json_lib
     
     # API KEY'i environment variable'dan oku
     api_key = os.getenv("OPENAI_API_KEY")
@@ -71,23 +99,54 @@ def call_llm_api(text: str, risk_score: float = 0.0) -> dict:
             "Yüklemek için: pip install openai"
         )
     
-    client = OpenAI(api_key=api_key)
+    return OpenAI(api_key=api_key)
+
+
+# Process başına tek client, tüm judge thread'leri paylaşır (OpenAI client
+# thread-safe): HTTP bağlantı havuzu sayesinde her çağrıda yeni TLS bağlantısı açılmaz
+_client = None
+_client_lock = threading.Lock()
+
+
+def _get_client():
+    """Paylaşılan OpenAI client'ı döndür (ilk çağrıda oluşturulur)"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = _create_client()
+    return _client
+
+
+def _complete_json(client, prompt: str) -> dict:
+    """Judge prompt'unu gönder ve JSON cevabı parse et"""
+    response = client.chat.completions.create(
+        model=JUDGE_MODEL,
+        messages=[
+            {"role": "system", "content": JUDGE_SYSTEM_MESSAGE},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.0,  # Daha deterministik, katı kararlar
+        response_format={"type": "json_object"}
+    )
+    return orjson.loads(response.choices[0].message.content)
+
+
+def call_llm_api(text: str, risk_score: float = 0.0) -> dict:
+    """
+    LLM API çağrısı - OpenAI kullanıyor
+    API key'i OPENAI_API_KEY environment variable'ından alıyor
+    
+    Args:
+        text: Kontrol edilecek metin
+        risk_score: Risk skoru (0.0-1.0), LLM'e bilgi vermek için
+    """
+    client = _get_client()
     
     prompt = JUDGE_PROMPT.format(text=text, risk_score=risk_score)
     
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",  # veya "gpt-4o" daha iyi sonuçlar için
-            messages=[
-                {"role": "system", "content": "Sen çok katı bir veri kalite denetçisisin. Şüpheli içerikleri DROP et. Sadece JSON döndür."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.0,  # Daha deterministik, katı kararlar
-            response_format={"type": "json_object"}
-        )
-        
-        result = json_lib.loads(response.choices[0].message.content)
-        return result
+        return _complete_json(client, prompt)
         
     except Exception as e:
         # API hatası durumunda güvenli varsayılan (DROP)
@@ -99,22 +158,40 @@ def call_llm_api(text: str, risk_score: float = 0.0) -> dict:
         }
 
 
-def run_llm_judge(text: str, risk_score: float = 0.0) -> tuple[str, str, str]:
+def call_llm_api_batch(texts: list[str], risk_scores: list[float]) -> Optional[list[dict]]:
     """
-    LLM judge ile metni değerlendir
+    Birden fazla metni tek LLM çağrısında değerlendir
+    (HTTP isteği ve kural/system prompt token'ları metin başına değil, batch başına ödenir)
     
     Args:
-        text: Kontrol edilecek metin
-        risk_score: Risk skoru (0.0-1.0), LLM'e bilgi vermek için
+        texts: Kontrol edilecek metinler
+        risk_scores: Her metnin risk skoru
     
     Returns:
-        (action, text, reason) tuple
-        - action: "KEEP" veya "DROP"
-        - text: Temizlenmiş metin (KEEP ise)
-        - reason: Karar nedeni
+        texts ile aynı sırada sonuç dict'leri, cevap eksik/bozuksa None
     """
-    result = call_llm_api(text, risk_score=risk_score)
+    client = _get_client()
+    
+    items = [
+        {"id": i, "risk_score": round(score, 2), "text": text}
+        for i, (text, score) in enumerate(zip(texts, risk_scores))
+    ]
+    prompt = JUDGE_BATCH_PROMPT.format(items=orjson.dumps(items, option=orjson.OPT_INDENT_2).decode("utf-8"))
+    
+    try:
+        results = _complete_json(client, prompt).get("results")
+        by_id = {r.get("id"): r for r in results if isinstance(r, dict)}
+    except Exception as e:
+        print(f"LLM API hatası (batch): {e}")
+        return None
+    
+    if any(i not in by_id for i in range(len(texts))):
+        return None  # Bazı metinler için karar yok
+    return [by_id[i] for i in range(len(texts))]
+
 
+def _to_judgement(result: dict, text: str) -> tuple[str, str, str]:
+    """LLM sonucunu (action, text, reason) tuple'ına çevir"""
     action = result.get("action", "DROP")
     reason = result.get("reason", "unknown")
 
@@ -128,3 +205,39 @@ def run_llm_judge(text: str, risk_score: float = 0.0) -> tuple[str, str, str]:
     # Her durumda DROP
     return "DROP", "", reason
 
+
+def run_llm_judge(text: str, risk_score: float = 0.0) -> tuple[str, str, str]:
+    """
+    LLM judge ile metni değerlendir
+    
+    Args:
+        text: Kontrol edilecek metin
+        risk_score: Risk skoru (0.0-1.0), LLM'e bilgi vermek için
+    
+    Returns:
+        (action, text, reason) tuple
+        - action: "KEEP" veya "DROP"
+        - text: Temizlenmiş metin (KEEP ise)
+        - reason: Karar nedeni
+    """
+    result = call_llm_api(text, risk_score=risk_score)
+    return _to_judgement(result, text)
+
+
+def run_llm_judge_batch(texts: list[str], risk_scores: list[float]) -> list[tuple[str, str, str]]:
+    """
+    LLM judge ile birden fazla metni tek istekte değerlendir
+    
+    Args:
+        texts: Kontrol edilecek metinler
+        risk_scores: Her metnin risk skoru
+    
+    Returns:
+        texts ile aynı sırada (action, text, reason) tuple'ları.
+        Toplu cevap bozuksa metinler tek tek değerlendirilir.
+    """
+    results = call_llm_api_batch(texts, risk_scores)
+    if results is None:
+        # Bozuk/eksik cevap: tekli çağrılara geri dön
+        return [run_llm_judge(text, risk_score=score) for text, score in zip(texts, risk_scores)]
+    return [_to_judgement(result, text) for result, text in zip(results, texts)]
@@ -1,7 +1,18 @@
-import json
-from .risk_scoring import compute_risk_score
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+import orjson
+
+from jsonl_io import iter_lines, prefetch, WRITE_BUFFER_SIZE
+from .risk_scoring import compute_risk_scores
 from .thresholds import KEEP_THRESHOLD, LLM_THRESHOLD
-from .llm_judge import run_llm_judge
+from .llm_judge import run_llm_judge_batch
+
+
+# Input lines per chunk read ahead on a background thread, and chunks kept ready
+READ_AHEAD_LINES = 4096
+READ_AHEAD_CHUNKS = 2
 
 
 def quality_pass(
@@ -9,73 +20,133 @@ def quality_pass(
     output_file: str,
     dropped_file: str,
     progress_interval: int = 1000,
+    llm_workers: int = 16,
+    llm_batch_size: int = 16,
 ):
     """
     Quality pass with LLM judge
     
+    Gray-zone texts are judged llm_batch_size at a time per LLM request, on a
+    thread pool (the LLM calls are network-bound), so up to llm_workers requests
+    are in flight while scoring continues.
+    Results are written in input order, as in a serial pass. Input lines are
+    read ahead in chunks on a background thread, so file reads overlap scoring.
+    
     Args:
         input_file: Input JSONL file
         output_file: Output file for kept items
         dropped_file: Output file for dropped items
         progress_interval: Print progress every N items
+        llm_workers: Number of concurrent LLM judge calls
+        llm_batch_size: Gray-zone texts per LLM judge call
     """
     kept = dropped = llm_checked = 0
     total = 0
 
-    with open(input_file, "r", encoding="utf-8") as inp, \
-         open(output_file, "w", encoding="utf-8") as out, \
-         open(dropped_file, "w", encoding="utf-8") as drop:
+    # Records waiting to be written, in input order:
+    # (line, text, score, batch, index, line_is_text_only).
+    # batch is None outside the gray zone. Bounded so at most a few windows of
+    # gray-zone texts are held in memory.
+    pending = deque()
+    max_pending = llm_workers * llm_batch_size * 4
+    
+    # Gray-zone batch being filled: {"texts", "scores", "future"}
+    batch = None
+
+    # Input lines are raw bytes (no text decoding); dropped lines are copied as-is
+    with open(output_file, "wb", buffering=WRITE_BUFFER_SIZE) as out, \
+         open(dropped_file, "wb", buffering=WRITE_BUFFER_SIZE) as drop, \
+         ThreadPoolExecutor(max_workers=llm_workers) as executor:
 
-        for line in inp:
+        def submit(job):
+            # Send a gray-zone batch to the LLM judge
+            nonlocal batch
+            job["future"] = executor.submit(run_llm_judge_batch, job["texts"], job["scores"])
+            if job is batch:
+                batch = None
+        
+        def head_ready() -> bool:
+            job = pending[0][3]
+            return job is None or (job["future"] is not None and job["future"].done())
+        
+        def write_next():
+            nonlocal total, kept, dropped
+            line, text, score, job, index, line_is_text_only = pending.popleft()
             total += 1
-            text = json.loads(line)["text"]
-            score = compute_risk_score(text)
 
             # Güvenli
             if score < KEEP_THRESHOLD:
-                out.write(json.dumps({"text": text}, ensure_ascii=False) + "\n")
+                if line_is_text_only:
+                    # Already a {"text": ...} JSON line: copy it, no re-encoding
+                    out.write(line + b"\n")
+                else:
+                    out.write(orjson.dumps({"text": text}, option=orjson.OPT_APPEND_NEWLINE))
                 kept += 1
-                
-                # Progress
-                if total % progress_interval == 0:
-                    print(f"Progress: {total:,} | Kept: {kept:,} | Dropped: {dropped:,} | LLM checks: {llm_checked:,}")
-                
-                continue
-
-            # Gri alan → LLM
-            if score < LLM_THRESHOLD:
-                llm_checked += 1
-                
-                # LLM progress
-                if llm_checked % 100 == 0:
-                    print(f"LLM Analizi: {llm_checked:,} / Score: {score:.2f}")
-                
-                # Risk score'u LLM'e gönder (daha katı karar vermesi için)
-                action, new_text, reason = run_llm_judge(text, risk_score=score)
+
+            # Gri alan → LLM kararı
+            elif job is not None:
+                if job["future"] is None:
+                    submit(job)  # Partial batch the output is waiting on
+                action, new_text, reason = job["future"].result()[index]
                 if action == "KEEP":
-                    out.write(json.dumps({"text": new_text}, ensure_ascii=False) + "\n")
+                    out.write(orjson.dumps({"text": new_text}, option=orjson.OPT_APPEND_NEWLINE))
                     kept += 1
                 else:
-                    drop.write(line)
+                    drop.write(line + b"\n")
                     dropped += 1
                     # Dropped için reason'ı loglayabiliriz (opsiyonel)
                     if llm_checked % 100 == 0:
                         print(f"  → Dropped (reason: {reason})")
-                
-                # Progress
-                if total % progress_interval == 0:
-                    print(f"Progress: {total:,} | Kept: {kept:,} | Dropped: {dropped:,} | LLM checks: {llm_checked:,}")
-                
-                continue
 
             # Yüksek risk → DROP
-            drop.write(line)
-            dropped += 1
-            
+            else:
+                drop.write(line + b"\n")
+                dropped += 1
+
             # Progress
             if total % progress_interval == 0:
                 print(f"Progress: {total:,} | Kept: {kept:,} | Dropped: {dropped:,} | LLM checks: {llm_checked:,}")
 
+        lines_iter = iter_lines(input_file)
+        line_chunks = prefetch(
+            iter(lambda: list(islice(lines_iter, READ_AHEAD_LINES)), []),
+            max_pending=READ_AHEAD_CHUNKS,
+        )
+        for lines in line_chunks:
+            records = [orjson.loads(line) for line in lines]
+            # Scored per chunk (character classes counted for the whole chunk at once)
+            scores = compute_risk_scores([data["text"] for data in records])
+            for line, data, score in zip(lines, records, scores):
+                text = data["text"]
+                job = index = None
+
+                # Gri alan → LLM
+                if KEEP_THRESHOLD <= score < LLM_THRESHOLD:
+                    llm_checked += 1
+
+                    # LLM progress
+                    if llm_checked % 100 == 0:
+                        print(f"LLM Analizi: {llm_checked:,} / Score: {score:.2f}")
+
+                    # Risk score'u LLM'e gönder (daha katı karar vermesi için)
+                    if batch is None:
+                        batch = {"texts": [], "scores": [], "future": None}
+                    job = batch
+                    index = len(job["texts"])
+                    job["texts"].append(text)
+                    job["scores"].append(score)
+                    if len(job["texts"]) >= llm_batch_size:
+                        submit(job)
+
+                pending.append((line, text, score, job, index, len(data) == 1))
+
+                # Write finished records; block on the oldest one once the window is full
+                while pending and (len(pending) > max_pending or head_ready()):
+                    write_next()
+
+        while pending:
+            write_next()
+
     print("\n" + "=" * 60)
     print("=== QUALITY PASS REPORT ===")
     print("=" * 60)
@@ -1,4 +1,9 @@
 import re
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
 from .rules import (
     PII_REGEX, 
     BOILERPLATE_KEYWORDS, 
@@ -10,32 +15,398 @@ from .rules import (
     SOCIAL_MEDIA_KEYWORDS,
 )
 
+# Hyperscan matches all keyword lists below in one pass over the lowercased
+# text's UTF-8 bytes (a keyword is a substring of the text iff its bytes are
+# a substring of the text's bytes). Without it, a pyahocorasick automaton finds
+# them in one pass over the text; without either, each keyword is checked with `in`.
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Numba compiles the per-character classification (CJK / non-Latin / special
+# characters) into one machine-code pass over the text's code points.
+# Without it, long texts are classified with vectorized NumPy range checks
+# on their UTF-32 code points, and short ones in a Python loop.
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from numba import njit, types as numba_types
+except ImportError:
+    njit = None
+
+
+# Keyword lists matched against the lowercased text, by name
+_KEYWORD_GROUPS = {
+    "boilerplate": BOILERPLATE_KEYWORDS,
+    "toxic": TOXIC_KEYWORDS,
+    "ecommerce": [pattern.lower() for pattern in E_COMMERCE_PATTERNS],
+    "size_chart": ["boyut grafiği", "size chart", "cm/inç", "cm/inch"],
+    "shipping": ["kargo", "shipping", "teslimat", "delivery"],
+    "free_shipping": ["ücretsiz", "free"],
+    "seo": [pattern.lower() for pattern in SEO_PATTERNS],
+    "astrology": ASTROLOGY_KEYWORDS,
+    "forum": FORUM_SPAM_PATTERNS,
+    "short_comment": ["teşekkürler", "thanks", "güzel", "nice"],
+    "social_media": SOCIAL_MEDIA_KEYWORDS,
+}
+
+# Group of each keyword, indexed by Hyperscan expression id
+_KEYWORD_GROUP_OF = [group for group, keywords in _KEYWORD_GROUPS.items() for _ in keywords]
+
+# Below this many characters the Python loop beats NumPy's per-call overhead
+_NUMPY_MIN_CHARS = 512
+
+# Scores of short texts (repeated cookie banners, nav snippets, short comments)
+# are cached; long texts are rarely repeated and would fill the cache
+_SCORE_CACHE_MAX_CHARS = 512
+_SCORE_CACHE_SIZE = 1 << 14
+
+# Scores of long texts are cached by the text's hash only (the text itself
+# is not kept alive), in a small LRU
+_LONG_SCORE_CACHE_SIZE = 4096
+_long_score_cache = OrderedDict()
+
+# From this many words on, Counter beats an early-exit counting loop
+_WORD_COUNTER_MIN_WORDS = 300
+
+# Any character above Latin Extended-A (the only ones _char_stats classifies)
+_ABOVE_LATIN_EXT_A_RE = re.compile('[^\u0000-\u017f]')
+
+_PRICE_RE = re.compile(r'\d+[.,]\d+\s*(tl|₺|usd|\$|eur|€)', re.IGNORECASE)
+
+
+def _compile_keyword_db():
+    """
+    Compile every keyword of _KEYWORD_GROUPS into one Hyperscan database
+    (each reported at most once per scan)
+    
+    Returns:
+        Hyperscan database, or None if Hyperscan is unavailable
+    """
+    if hyperscan is None:
+        return None
+    
+    keywords = [keyword for group in _KEYWORD_GROUPS.values() for keyword in group]
+    try:
+        db = hyperscan.Database()
+        db.compile(
+            expressions=[re.escape(keyword).encode("utf-8") for keyword in keywords],
+            ids=list(range(len(keywords))),
+            elements=len(keywords),
+            flags=[hyperscan.HS_FLAG_SINGLEMATCH] * len(keywords),
+        )
+    except hyperscan.error:
+        return None
+    return db
+
+
+def _build_keyword_automaton():
+    """
+    Build one Aho-Corasick automaton over every keyword of _KEYWORD_GROUPS
+    (a keyword listed in several groups maps to all its expression ids)
+    
+    Returns:
+        pyahocorasick Automaton, or None if pyahocorasick is unavailable
+    """
+    if ahocorasick is None:
+        return None
+    
+    ids_of = {}
+    keywords = [keyword for group in _KEYWORD_GROUPS.values() for keyword in group]
+    for keyword_id, keyword in enumerate(keywords):
+        ids_of.setdefault(keyword, []).append(keyword_id)
+    
+    automaton = ahocorasick.Automaton()
+    for keyword, keyword_ids in ids_of.items():
+        automaton.add_word(keyword, tuple(keyword_ids))
+    automaton.make_automaton()
+    return automaton
 
-def _has_chinese_characters(text: str) -> bool:
-    """Check if text contains Chinese characters (CJK unified ideographs)"""
-    # CJK Unified Ideographs range: U+4E00 to U+9FFF
-    # Also includes CJK Extension A: U+3400 to U+4DBF
+
+_KEYWORD_DB = _compile_keyword_db()
+# Only needed when Hyperscan is unavailable
+_KEYWORD_AUTOMATON = _build_keyword_automaton() if _KEYWORD_DB is None else None
+
+
+def _on_keyword_match(keyword_id, start, end, flags, counts):
+    """Hyperscan match handler: count the keyword for its group"""
+    counts[_KEYWORD_GROUP_OF[keyword_id]] += 1
+
+
+def _keyword_counts(t: str) -> Dict[str, int]:
+    """
+    Count how many keywords of each _KEYWORD_GROUPS list occur in t
+    
+    Args:
+        t: Lowercased text
+        
+    Returns:
+        Dict of {group_name: number of the group's keywords found in t}
+    """
+    counts = dict.fromkeys(_KEYWORD_GROUPS, 0)
+    
+    if _KEYWORD_DB is not None:
+        try:
+            data = t.encode("utf-8")
+        except UnicodeEncodeError:
+            pass  # Lone surrogates: fall back to `in`
+        else:
+            _KEYWORD_DB.scan(data, match_event_handler=_on_keyword_match, context=counts)
+            return counts
+    
+    if _KEYWORD_AUTOMATON is not None:
+        # Every occurrence is reported: count each keyword once
+        found = set()
+        for _, keyword_ids in _KEYWORD_AUTOMATON.iter(t):
+            found.update(keyword_ids)
+        for keyword_id in found:
+            counts[_KEYWORD_GROUP_OF[keyword_id]] += 1
+        return counts
+    
+    for group, keywords in _KEYWORD_GROUPS.items():
+        counts[group] = sum(1 for keyword in keywords if keyword in t)
+    return counts
+
+
+def _code_points(text: str):
+    """Code points of text as a read-only uint32 array (one UTF-32 encode)"""
+    # surrogatepass: lone surrogates become their own code point, as in Python
+    return np.frombuffer(text.encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+
+
+def _char_stats_kernel(cps):
+    """
+    Count (non-whitespace, CJK, non-Latin, special) characters of a uint32
+    code point array, classifying them exactly like the Python loop of _char_stats
+    """
+    non_ws = 0
+    cjk = 0
+    non_latin = 0
+    special = 0
+    for i in range(cps.shape[0]):
+        cp = cps[i]
+        # Everything str.isspace() accepts (char.strip() == "")
+        if (
+            (0x09 <= cp <= 0x0D) or (0x1C <= cp <= 0x20) or cp == 0x85 or cp == 0xA0
+            or cp == 0x1680 or (0x2000 <= cp <= 0x200A) or cp == 0x2028 or cp == 0x2029
+            or cp == 0x202F or cp == 0x205F or cp == 0x3000
+        ):
+            continue
+        non_ws += 1
+        
+        # Outside ASCII / Latin-1 / Latin Extended-A (Turkish letters and the
+        # allowed punctuation are all inside)
+        if cp > 0x017F:
+            special += 1
+            if (0x4E00 <= cp <= 0x9FFF) or (0x3400 <= cp <= 0x4DBF):
+                cjk += 1
+            # Outside the Latin ranges of _detect_mixed_language (no code point
+            # outside them lowercases to a Turkish letter)
+            if not ((cp <= 0x024F) or (0x1E00 <= cp <= 0x1EFF) or (0x0300 <= cp <= 0x036F)):
+                non_latin += 1
+    return non_ws, cjk, non_latin, special
+
+
+if njit is not None:
+    # Explicit signature: compiled (or loaded from the on-disk cache) at import,
+    # not on the first text of every worker; np.frombuffer arrays are read-only
+    _char_stats_kernel = njit(
+        numba_types.UniTuple(numba_types.int64, 4)(
+            numba_types.Array(numba_types.uint32, 1, "C", readonly=True)
+        ),
+        cache=True,
+        nogil=True,
+    )(_char_stats_kernel)
+
+
+def _ascii_non_whitespace_kernel(data):
+    """
+    Count the non-whitespace bytes of ASCII text: the only non-zero count
+    for ASCII (a plain compare-and-add loop, which LLVM vectorizes)
+    """
+    whitespace = 0
+    for i in range(data.shape[0]):
+        b = data[i]
+        if (0x09 <= b <= 0x0D) or (0x1C <= b <= 0x20):
+            whitespace += 1
+    return data.shape[0] - whitespace
+
+
+if njit is not None:
+    _ascii_non_whitespace_kernel = njit(
+        numba_types.int64(numba_types.Array(numba_types.uint8, 1, "C", readonly=True)),
+        cache=True,
+        nogil=True,
+    )(_ascii_non_whitespace_kernel)
+
+
+# Vectorized code point classes (uint32 arrays; `x - lo <= hi - lo` on uint32
+# is `lo <= x <= hi`), same classes as the Python loop of _char_stats
+
+def _low_whitespace_mask(cps):
+    """Whitespace up to U+017F: tab to carriage return, U+001C to space, U+0085, U+00A0"""
+    u = np.uint32
+    return (
+        ((cps - u(0x09)) <= u(0x04)) | ((cps - u(0x1C)) <= u(0x04))
+        | (cps == u(0x85)) | (cps == u(0xA0))
+    )
+
+
+def _high_whitespace_mask(cps):
+    """Whitespace above U+017F"""
+    u = np.uint32
+    return (
+        ((cps - u(0x2000)) <= u(0x0A)) | (cps == u(0x1680)) | (cps == u(0x2028))
+        | (cps == u(0x2029)) | (cps == u(0x202F)) | (cps == u(0x205F)) | (cps == u(0x3000))
+    )
+
+
+def _cjk_mask(cps):
+    """CJK Unified Ideographs and Extension A"""
+    u = np.uint32
+    return ((cps - u(0x4E00)) <= u(0x51FF)) | ((cps - u(0x3400)) <= u(0x09BF))
+
+
+def _latin_mask(cps):
+    """Latin ranges of _detect_mixed_language above Latin Extended-A"""
+    u = np.uint32
+    return (cps <= u(0x024F)) | ((cps - u(0x1E00)) <= u(0xFF)) | ((cps - u(0x0300)) <= u(0x6F))
+
+
+def _char_stats_numpy(text: str) -> Tuple[int, int, int, int]:
+    """(non_whitespace, cjk, non_latin, special) counts of text, vectorized"""
+    cps = _code_points(text)
+    low_ws = np.count_nonzero(_low_whitespace_mask(cps))
+    # Only code points above Latin Extended-A need further classification
+    # (few in Turkish/English text)
+    above = cps[cps > np.uint32(0x017F)]
+    high = above[~_high_whitespace_mask(above)]
+    
+    non_ws = cps.size - low_ws - (above.size - high.size)
+    cjk = np.count_nonzero(_cjk_mask(high))
+    latin = np.count_nonzero(_latin_mask(high))
+    return int(non_ws), int(cjk), int(high.size - latin), int(high.size)
+
+
+def _char_stats_numpy_batch(texts: List[str]) -> List[Tuple[int, int, int, int]]:
+    """
+    _char_stats_numpy of many texts at once: their code points are classified
+    as one concatenated array and counted per text by offset (one NumPy call
+    sequence for the batch instead of per-text call overhead)
+    """
+    if not texts:
+        return []
+    n = len(texts)
+    cps = _code_points("".join(texts))
+    lengths = np.fromiter(map(len, texts), dtype=np.int64, count=n)
+    ends = np.cumsum(lengths)
+    
+    # Cumulative whitespace count: whitespace of a text = difference at its bounds
+    low_ws = np.concatenate(([0], np.cumsum(_low_whitespace_mask(cps))))
+    # Code points above Latin Extended-A, with the index of their text
+    positions = np.flatnonzero(cps > np.uint32(0x017F))
+    above = cps[positions]
+    text_of = np.searchsorted(ends, positions, side="right")
+    high_ws = _high_whitespace_mask(above)
+    high = above[~high_ws]
+    high_text = text_of[~high_ws]
+    
+    non_ws = lengths - (low_ws[ends] - low_ws[ends - lengths]) - np.bincount(text_of[high_ws], minlength=n)
+    cjk = np.bincount(high_text[_cjk_mask(high)], minlength=n)
+    non_latin = np.bincount(high_text[~_latin_mask(high)], minlength=n)
+    special = np.bincount(high_text, minlength=n)
+    return list(zip(non_ws.tolist(), cjk.tolist(), non_latin.tolist(), special.tolist()))
+
+
+def _char_stats(text: str) -> Tuple[int, int, int, int]:
+    """
+    Per-character counts used by the CJK / mixed-language / special-character
+    detectors, computed in one pass (compiled with Numba, or vectorized with
+    NumPy for long texts, when available)
+    
+    Returns:
+        (non_whitespace, cjk, non_latin, special) counts
+    """
+    if njit is not None:
+        # ASCII (CPython keeps this flag on the str, so the check is O(1)):
+        # only whitespace to count, one byte per character
+        if text.isascii():
+            data = np.frombuffer(text.encode("ascii"), dtype=np.uint8)
+            return _ascii_non_whitespace_kernel(data), 0, 0, 0
+        return _char_stats_kernel(_code_points(text))
+    if np is not None and len(text) >= _NUMPY_MIN_CHARS:
+        return _char_stats_numpy(text)
+    
+    # Text entirely in ASCII / Latin-1 / Latin Extended-A (most Turkish and
+    # English text): nothing to classify, and the non-whitespace characters
+    # are what str.split() keeps - both scans run in C on the str's own buffer
+    if text.isascii() or _ABOVE_LATIN_EXT_A_RE.search(text) is None:
+        return sum(map(len, text.split())), 0, 0, 0
+    
+    non_ws = 0
+    cjk = 0
+    non_latin = 0
+    special = 0
     for char in text:
+        if char.isspace():  # Same as char.strip() == ""
+            continue
+        non_ws += 1
         code_point = ord(char)
+        # ASCII / Latin-1 / Latin Extended-A hold the Turkish letters and the
+        # allowed punctuation: nothing else to classify
+        if code_point <= 0x017F:
+            continue
+        special += 1
         if (0x4E00 <= code_point <= 0x9FFF) or (0x3400 <= code_point <= 0x4DBF):
-            return True
-    return False
+            cjk += 1
+        # Outside the Latin ranges of _detect_mixed_language (no code point
+        # outside them lowercases to a Turkish letter)
+        if not (
+            (code_point <= 0x024F) or  # Latin Extended-B
+            (0x1E00 <= code_point <= 0x1EFF) or  # Latin Extended Additional
+            (0x0300 <= code_point <= 0x036F)     # Combining Diacritical Marks
+        ):
+            non_latin += 1
+    return non_ws, cjk, non_latin, special
+
+
+@dataclass(slots=True)
+class _TextFeatures:
+    """
+    Views of one text shared by all detectors, each derived once per text
+    (detectors read these instead of re-lowercasing, re-splitting or
+    re-scanning the text)
+    """
+    text: str
+    lower: str  # text.lower()
+    counts: Dict[str, int]  # _keyword_counts(lower)
+    words: List[str]  # lower.split()
+    http_count: int  # lower.count("http")
+    stats: Optional[Tuple[int, int, int, int]] = None  # _char_stats(text), set before the character detectors
 
 
-def _chinese_character_ratio(text: str) -> float:
-    """Calculate ratio of Chinese characters in text"""
-    if not text:
+def _has_chinese_characters(features: _TextFeatures) -> bool:
+    """Check if text contains Chinese characters (CJK unified ideographs)"""
+    # CJK Unified Ideographs range: U+4E00 to U+9FFF
+    # Also includes CJK Extension A: U+3400 to U+4DBF
+    return features.stats[1] > 0
+
+
+def _chinese_character_ratio(features: _TextFeatures) -> float:
+    """Calculate ratio of Chinese characters in text (whitespace not counted)"""
+    if not features.text:
         return 0.0
     
-    chinese_count = 0
-    total_chars = 0
-    
-    for char in text:
-        if char.strip():  # Skip whitespace
-            total_chars += 1
-            code_point = ord(char)
-            if (0x4E00 <= code_point <= 0x9FFF) or (0x3400 <= code_point <= 0x4DBF):
-                chinese_count += 1
+    total_chars, chinese_count, _, _ = features.stats
     
     if total_chars == 0:
         return 0.0
@@ -43,13 +414,13 @@ def _chinese_character_ratio(text: str) -> float:
     return chinese_count / total_chars
 
 
-def _detect_ecommerce_spam(text: str) -> float:
+def _detect_ecommerce_spam(features: _TextFeatures) -> float:
     """Detect e-commerce spam patterns"""
-    t = text.lower()
     score = 0.0
+    counts = features.counts
     
     # Count e-commerce keywords
-    ecommerce_matches = sum(1 for pattern in E_COMMERCE_PATTERNS if pattern.lower() in t)
+    ecommerce_matches = counts["ecommerce"]
     
     # High density of e-commerce keywords suggests spam
     if ecommerce_matches >= 5:
@@ -58,92 +429,89 @@ def _detect_ecommerce_spam(text: str) -> float:
         score += 0.2
     
     # Product listing patterns (size charts, specifications)
-    if any(keyword in t for keyword in ["boyut grafiği", "size chart", "cm/inç", "cm/inch"]):
+    if counts["size_chart"]:
         score += 0.3
     
     # Price patterns (multiple prices suggest product listing)
-    price_pattern = r'\d+[.,]\d+\s*(tl|₺|usd|\$|eur|€)'
-    price_count = len(re.findall(price_pattern, t, re.IGNORECASE))
+    price_count = len(_PRICE_RE.findall(features.lower))
     if price_count >= 3:
         score += 0.3
     elif price_count >= 2:
         score += 0.15
     
     # Shipping/delivery info (common in e-commerce spam)
-    if any(keyword in t for keyword in ["kargo", "shipping", "teslimat", "delivery"]):
-        if "ücretsiz" in t or "free" in t:
+    if counts["shipping"]:
+        if counts["free_shipping"]:
             score += 0.2
     
     return min(score, 0.5)  # Cap e-commerce score at 0.5
 
 
-def _detect_seo_spam(text: str) -> float:
+def _has_frequent_word(words: List[str], min_count: float) -> bool:
+    """
+    Check whether any word longer than 3 characters occurs at least min_count times
+    
+    Short word lists are counted in a loop that stops at the first word
+    reaching min_count; long ones are counted in C by Counter, which is
+    faster there even though it counts every word.
+    """
+    if len(words) >= _WORD_COUNTER_MIN_WORDS:
+        word_freq = Counter([word for word in words if len(word) > 3])
+        return bool(word_freq) and max(word_freq.values()) >= min_count
+    
+    word_freq = {}
+    get = word_freq.get
+    for word in words:
+        if len(word) > 3:
+            count = word_freq[word] = get(word, 0) + 1
+            if count >= min_count:
+                return True
+    return False
+
+
+def _detect_seo_spam(features: _TextFeatures) -> float:
     """Detect SEO spam patterns"""
-    t = text.lower()
     score = 0.0
     
     # SEO pattern matches
-    seo_matches = sum(1 for pattern in SEO_PATTERNS if pattern.lower() in t)
+    seo_matches = features.counts["seo"]
     if seo_matches >= 3:
         score += 0.3
     elif seo_matches >= 2:
         score += 0.15
     
     # Excessive links
-    link_count = t.count("http") + t.count("www.")
+    link_count = features.http_count + features.lower.count("www.")
     if link_count >= 5:
         score += 0.4
     elif link_count >= 3:
         score += 0.2
     
     # Keyword density (repetitive keywords)
-    words = t.split()
+    words = features.words
     if len(words) > 0:
-        word_freq = {}
-        for word in words:
-            if len(word) > 3:  # Ignore short words
-                word_freq[word] = word_freq.get(word, 0) + 1
-        
-        # Check for excessive repetition of same word
-        max_freq = max(word_freq.values()) if word_freq else 0
-        if max_freq >= len(words) * 0.1:  # Same word appears >10% of time
+        # Check for excessive repetition of same word (ignore short words):
+        # same word appears >10% of time
+        if _has_frequent_word(words, len(words) * 0.1):
             score += 0.3
     
     return min(score, 0.4)  # Cap SEO score at 0.4
 
 
-def _detect_mixed_language(text: str) -> float:
+def _detect_mixed_language(features: _TextFeatures) -> float:
     """Detect mixed language issues (non-TR/EN characters)"""
     score = 0.0
     
     # Chinese character ratio
-    chinese_ratio = _chinese_character_ratio(text)
+    chinese_ratio = _chinese_character_ratio(features)
     if chinese_ratio > 0.1:  # More than 10% Chinese characters
         score += 0.5
     elif chinese_ratio > 0.05:  # More than 5% Chinese characters
         score += 0.3
     
     # Check for other non-Latin scripts (Arabic, Cyrillic, etc.)
-    # But be careful - Turkish has some special characters
-    non_latin_count = 0
-    total_chars = 0
-    
-    for char in text:
-        if char.strip():
-            total_chars += 1
-            code_point = ord(char)
-            # Allow Latin, Turkish special chars, numbers, punctuation
-            if not (
-                (0x0000 <= code_point <= 0x007F) or  # Basic Latin
-                (0x0080 <= code_point <= 0x00FF) or  # Latin-1 Supplement (includes Turkish)
-                (0x0100 <= code_point <= 0x017F) or  # Latin Extended-A
-                (0x0180 <= code_point <= 0x024F) or  # Latin Extended-B
-                (0x1E00 <= code_point <= 0x1EFF) or  # Latin Extended Additional
-                (0x0300 <= code_point <= 0x036F)     # Combining Diacritical Marks
-            ):
-                # Check if it's a known Turkish character (ş, ğ, ü, ö, ç, ı, İ)
-                if char.lower() not in ['ş', 'ğ', 'ü', 'ö', 'ç', 'ı', 'i']:
-                    non_latin_count += 1
+    # But be careful - Turkish has some special characters (Latin ranges, allowed)
+    total_chars, _, non_latin_count, _ = features.stats
     
     if total_chars > 0:
         non_latin_ratio = non_latin_count / total_chars
@@ -155,12 +523,11 @@ def _detect_mixed_language(text: str) -> float:
     return min(score, 0.5)  # Cap mixed language score at 0.5
 
 
-def _detect_astrology_content(text: str) -> float:
+def _detect_astrology_content(features: _TextFeatures) -> float:
     """Detect astrology/horoscope content"""
-    t = text.lower()
     score = 0.0
     
-    astrology_matches = sum(1 for keyword in ASTROLOGY_KEYWORDS if keyword in t)
+    astrology_matches = features.counts["astrology"]
     if astrology_matches >= 2:
         score += 0.4
     elif astrology_matches >= 1:
@@ -169,33 +536,45 @@ def _detect_astrology_content(text: str) -> float:
     return min(score, 0.4)
 
 
-def _detect_forum_spam(text: str) -> float:
+def _detect_forum_spam(features: _TextFeatures) -> float:
     """Detect forum/comment spam"""
-    t = text.lower()
     score = 0.0
+    counts = features.counts
     
     # Forum spam patterns
-    forum_matches = sum(1 for pattern in FORUM_SPAM_PATTERNS if pattern in t)
+    forum_matches = counts["forum"]
     if forum_matches >= 3:
         score += 0.3
     elif forum_matches >= 2:
         score += 0.15
     
     # Very short comments (likely forum spam)
-    words = t.split()
-    if len(words) < 15 and any(pattern in t for pattern in ["teşekkürler", "thanks", "güzel", "nice"]):
+    if len(features.words) < 15 and counts["short_comment"]:
         score += 0.3
     
     return min(score, 0.3)
 
 
-def _detect_repetitive_characters(text: str) -> float:
+def _detect_repetitive_characters(features: _TextFeatures) -> float:
     """Detect repetitive characters (aaaa, !!!!, ...)"""
     score = 0.0
     
-    # Check for 4+ consecutive same characters
-    repetitive_pattern = r'(.)\1{3,}'
-    matches = len(re.findall(repetitive_pattern, text))
+    # Count runs of 4+ consecutive same characters (other than newlines),
+    # stopping at 3: the score does not grow beyond that
+    matches = 0
+    run = 0
+    prev = ""
+    for char in features.text:
+        if char == prev:
+            run += 1
+            if run == 4 and char != "\n":
+                matches += 1
+                if matches >= 3:
+                    break
+        else:
+            run = 1
+            prev = char
+    
     if matches >= 3:
         score += 0.4
     elif matches >= 2:
@@ -206,9 +585,10 @@ def _detect_repetitive_characters(text: str) -> float:
     return min(score, 0.4)
 
 
-def _detect_social_media_spam(text: str) -> float:
+def _detect_social_media_spam(features: _TextFeatures) -> float:
     """Detect social media spam (hashtags, mentions)"""
     score = 0.0
+    text = features.text
     
     # Hashtag spam
     hashtag_count = text.count("#")
@@ -225,35 +605,20 @@ def _detect_social_media_spam(text: str) -> float:
         score += 0.15
     
     # Social media keywords
-    t = text.lower()
-    social_matches = sum(1 for keyword in SOCIAL_MEDIA_KEYWORDS if keyword in t)
+    social_matches = features.counts["social_media"]
     if social_matches >= 3:
         score += 0.2
     
     return min(score, 0.4)
 
 
-def _detect_special_characters(text: str) -> float:
+def _detect_special_characters(features: _TextFeatures) -> float:
     """Detect excessive special characters/emoji"""
     score = 0.0
     
-    # Count special characters (non-alphanumeric, non-space, non-punctuation)
-    special_count = 0
-    total_chars = 0
-    
-    for char in text:
-        if char.strip():
-            total_chars += 1
-            # Check if it's a special character (emoji, symbols)
-            code_point = ord(char)
-            if not (
-                (0x0000 <= code_point <= 0x007F) or  # ASCII
-                (0x0080 <= code_point <= 0x00FF) or  # Latin-1
-                (0x0100 <= code_point <= 0x017F) or  # Latin Extended-A
-                char in ['ş', 'ğ', 'ü', 'ö', 'ç', 'ı', 'İ', 'Ş', 'Ğ', 'Ü', 'Ö', 'Ç']
-            ):
-                if char not in ['.', ',', '!', '?', ';', ':', '-', '_', '(', ')', '[', ']', '{', '}', '"', "'"]:
-                    special_count += 1
+    # Count special characters (emoji, symbols: outside ASCII / Latin-1 /
+    # Latin Extended-A, which hold the Turkish letters and punctuation)
+    total_chars, _, _, special_count = features.stats
     
     if total_chars > 0:
         special_ratio = special_count / total_chars
@@ -265,12 +630,16 @@ def _detect_special_characters(text: str) -> float:
     return min(score, 0.3)
 
 
-def _detect_low_information_density(text: str) -> float:
+def _detect_low_information_density(features: _TextFeatures) -> float:
     """Detect low information density (too much whitespace/punctuation)"""
     score = 0.0
+    text = features.text
+    # Single-character str.count is a vectorized C scan (faster than one
+    # Counter/translate pass over the characters)
+    count = text.count
     
     # Whitespace ratio
-    whitespace_count = text.count(' ') + text.count('\n') + text.count('\t')
+    whitespace_count = count(' ') + count('\n') + count('\t')
     total_chars = len(text)
     if total_chars > 0:
         whitespace_ratio = whitespace_count / total_chars
@@ -278,8 +647,7 @@ def _detect_low_information_density(text: str) -> float:
             score += 0.2
     
     # Punctuation ratio
-    punctuation = '.,!?;:'
-    punct_count = sum(text.count(p) for p in punctuation)
+    punct_count = count('.') + count(',') + count('!') + count('?') + count(';') + count(':')
     if total_chars > 0:
         punct_ratio = punct_count / total_chars
         if punct_ratio > 0.2:  # More than 20% punctuation
@@ -292,86 +660,158 @@ def compute_risk_score(text: str) -> float:
     """
     Compute risk score for text (0.0 = safe, 1.0 = high risk)
     
+    Scores are kept in LRU caches (short texts by value, long texts by
+    hash), so repeated texts are scored once per process.
+    
     Args:
         text: Input text to score
         
     Returns:
         Risk score between 0.0 and 1.0
     """
+    if len(text) <= _SCORE_CACHE_MAX_CHARS:
+        return _cached_risk_score(text)
+    
+    key = hash(text)  # Computed once and stored on the str by CPython
+    score = _long_score_cache.get(key)
+    if score is not None:
+        _long_score_cache.move_to_end(key)
+        return score
+    score = _risk_score(text)
+    _long_score_cache[key] = score
+    if len(_long_score_cache) > _LONG_SCORE_CACHE_SIZE:
+        _long_score_cache.popitem(last=False)
+    return score
+
+
+def compute_risk_scores(texts: List[str]) -> List[float]:
+    """
+    compute_risk_score of many texts. Without Numba (but with NumPy), the
+    character classes of the whole batch are counted in one vectorized pass
+    instead of a Python loop per text (the score cache is not used here).
+    
+    Args:
+        texts: Input texts to score
+        
+    Returns:
+        Risk score of each text, in order
+    """
+    if njit is not None or np is None:
+        return [compute_risk_score(text) for text in texts]
+    return [_risk_score(text, stats) for text, stats in zip(texts, _char_stats_numpy_batch(texts))]
+
+
+def _risk_score(text: str, stats: Optional[Tuple[int, int, int, int]] = None) -> float:
+    """
+    Uncached compute_risk_score (stats: precomputed _char_stats of text)
+    
+    Detectors only add to the score, so scoring stops as soon as it reaches
+    the 1.0 cap (e.g. PII or toxic texts skip the remaining detectors).
+    The detectors still add up in the same order, so scores are unchanged.
+    """
     score = 0.0
-    t = text.lower()
 
     # PII
-    for r in PII_REGEX:
-        if re.search(r, text):
+    for pattern in PII_REGEX:
+        if pattern.search(text):
             score += 0.5
+    if score >= 1.0:
+        return 1.0
+
+    t = text.lower()
+    # All keyword lists at once (one Hyperscan pass when available)
+    counts = _keyword_counts(t)
 
     # Boilerplate
-    if any(k in t for k in BOILERPLATE_KEYWORDS):
+    if counts["boilerplate"]:
         score += 0.3
 
     # Toxic content (high priority)
-    if any(k in t for k in TOXIC_KEYWORDS):
+    if counts["toxic"]:
         score += 0.6
+        if score >= 1.0:
+            return 1.0
 
     # Low information
     if len(text) < 80:
         score += 0.2
 
+    # Views of the text shared by the detectors below (character stats are
+    # filled in only if scoring gets that far)
+    features = _TextFeatures(
+        text=text,
+        lower=t,
+        counts=counts,
+        words=t.split(),
+        http_count=t.count("http"),
+    )
+
     # SEO / link spam
-    if t.count("http") >= 2:
+    if features.http_count >= 2:
         score += 0.3
     
     # Enhanced SEO spam detection
-    seo_score = _detect_seo_spam(text)
+    seo_score = _detect_seo_spam(features)
     score += seo_score
 
     # Aşırı tekrar
-    words = t.split()
+    words = features.words
     if words:
         uniq_ratio = len(set(words)) / len(words)
         if uniq_ratio < 0.4:
             score += 0.3
+    if score >= 1.0:
+        return 1.0
+
+    # Character class counts for all character detectors, in one pass
+    features.stats = stats if stats is not None else _char_stats(text)
 
     # Chinese character detection
-    if _has_chinese_characters(text):
-        chinese_ratio = _chinese_character_ratio(text)
+    if _has_chinese_characters(features):
+        chinese_ratio = _chinese_character_ratio(features)
         if chinese_ratio > 0.1:
             score += 0.5  # High Chinese content
         elif chinese_ratio > 0.05:
             score += 0.3  # Moderate Chinese content
     
     # Mixed language detection
-    mixed_lang_score = _detect_mixed_language(text)
+    mixed_lang_score = _detect_mixed_language(features)
     score += mixed_lang_score
+    if score >= 1.0:
+        return 1.0
     
     # E-commerce spam detection
-    ecommerce_score = _detect_ecommerce_spam(text)
+    ecommerce_score = _detect_ecommerce_spam(features)
     score += ecommerce_score
     
     # Astrology content detection
-    astrology_score = _detect_astrology_content(text)
+    astrology_score = _detect_astrology_content(features)
     score += astrology_score
     
     # Forum spam detection
-    forum_score = _detect_forum_spam(text)
+    forum_score = _detect_forum_spam(features)
     score += forum_score
+    if score >= 1.0:
+        return 1.0
     
     # Repetitive characters
-    repetitive_score = _detect_repetitive_characters(text)
+    repetitive_score = _detect_repetitive_characters(features)
     score += repetitive_score
     
     # Social media spam
-    social_score = _detect_social_media_spam(text)
+    social_score = _detect_social_media_spam(features)
     score += social_score
     
     # Special characters
-    special_score = _detect_special_characters(text)
+    special_score = _detect_special_characters(features)
     score += special_score
     
     # Low information density
-    info_score = _detect_low_information_density(text)
+    info_score = _detect_low_information_density(features)
     score += info_score
 
     return min(score, 1.0)
 
+
+_cached_risk_score = lru_cache(maxsize=_SCORE_CACHE_SIZE)(_risk_score)
+
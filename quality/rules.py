@@ -1,7 +1,10 @@
+import re
+
+# Compiled once at import (each pattern adds to the risk score separately)
 PII_REGEX = [
-    r"\b\d{10,11}\b",  # telefon
-    r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}",  # email
-    r"\bTR\d{24}\b",  # IBAN
+    re.compile(r"\b\d{10,11}\b"),  # telefon
+    re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}"),  # email
+    re.compile(r"\bTR\d{24}\b"),  # IBAN
 ]
 
 BOILERPLATE_KEYWORDS = [
@@ -0,0 +1,83 @@
+"""
+Tests for the Hyperscan PII prefilter: with Hyperscan installed, pii_filter
+must give exactly the re-only result (run from the repo root:
+python -m unittest discover -s tests)
+"""
+import random
+import unittest
+
+import pii_filter
+from config import DEFAULT_PII_PATTERNS
+
+# Characters re.IGNORECASE folds to ASCII letters (İ, ı, ſ, Kelvin sign K)
+CASE_FOLD_CHARS = "İıſK"
+
+# Biased towards what the default patterns match: letters, digits, e-mail
+# punctuation, separators, plus Unicode digits/whitespace and Turkish letters
+ALPHABET = (
+    "abcdeiksxyzAEIKSZ" * 3
+    + "0123456789" * 6
+    + "@@@...--__%+ "
+    + "٣５"  # Arabic-Indic 3, fullwidth 5 (\d in re)
+    + "  \x1c\x85\t\n"  # Whitespace str.isspace() accepts
+    + "ğüşöçĞÜŞÖÇ"
+    + CASE_FOLD_CHARS * 3
+)
+
+
+def _re_only_has_pii(text: str) -> bool:
+    """Result of the plain re alternation, without the Hyperscan prefilter"""
+    regex, _ = pii_filter._get_pii_matchers()
+    return regex.search(text) is not None
+
+
+@unittest.skipIf(pii_filter.hyperscan is None, "hyperscan is not installed")
+class HyperscanPrefilterTest(unittest.TestCase):
+    def setUp(self):
+        _, db = pii_filter._get_pii_matchers()
+        self.assertIsNotNone(db, "default PII patterns should compile for Hyperscan")
+
+    def test_widened_patterns_cover_case_fold_closure(self):
+        for pattern in DEFAULT_PII_PATTERNS:
+            widened = pii_filter._widen_for_hyperscan(pattern)
+            self.assertIsNotNone(widened)
+            if "A-Z" in pattern:
+                for c in CASE_FOLD_CHARS:
+                    self.assertIn(f"\\x{{{ord(c):x}}}", widened)
+
+    def test_case_fold_characters(self):
+        texts = [
+            "a@b.ſe",  # ſ in the TLD
+            "x@K.com",  # Kelvin sign in the domain
+            "ſ@K.co",
+            "mail: user@site.İT",
+            "mail: user@site.iı",
+            "x@y.Kſ here",
+        ]
+        for text in texts:
+            self.assertTrue(_re_only_has_pii(text), text)
+            self.assertFalse(pii_filter.pii_filter(text), text)
+
+    def test_random_texts_match_re_only_path(self):
+        rng = random.Random(0)
+        choices = rng.choices
+        mismatches = []
+        hits = 0
+        for i in range(200_000):
+            if i % 2:
+                text = "".join(choices(ALPHABET, k=rng.randint(1, 40)))
+            else:
+                # E-mail shaped: local@domain.tld, each part random
+                text = "".join(
+                    "".join(choices(ALPHABET, k=rng.randint(1, 6))) + sep for sep in "@. "
+                )
+            expected = _re_only_has_pii(text)
+            hits += expected
+            if pii_filter.pii_filter(text) == expected:  # True means no PII
+                mismatches.append(text)
+        self.assertEqual(mismatches, [])
+        self.assertGreater(hits, 1000)  # The corpus must actually exercise the patterns
+
+
+if __name__ == "__main__":
+    unittest.main()